@@ -1,7 +1,14 @@
 # controller.py
+import concurrent.futures
+import os
+import queue
 import threading
 import time
 from enum import Enum, auto
+from source_scanner import SourceScanner, SourceEvent
+from stream_health import StreamHealthMonitor, HealthEvent
+from poll_scheduler import PollScheduler
+from standby_playlist import StandbyPlaylist
 
 # 定义程序可能处于的几种状态
 class AppState(Enum):
@@ -23,6 +30,13 @@ class AppController:
         self.ffmpeg = ffmpeg_manager
         self.finder = stream_finder
 
+        # 后台组件（扫描器等）通过这个队列向控制器发布事件
+        self.events = queue.Queue()
+        self.scanner = SourceScanner(logger, stream_finder, self.events)
+        self.scheduler = PollScheduler(logger, config_manager)
+        self.health = StreamHealthMonitor(logger, config_manager, youtube_manager, self.events)
+        self.playlist = StandbyPlaylist(logger, ffmpeg_manager.media_probe)
+
         self.is_running = False
         self.main_thread = None
         self.current_state = AppState.IDLE
@@ -34,9 +48,11 @@ class AppController:
         }
         
         self.douyin_ids = []
+        self.current_douyin_id = None
         self.current_douyin_url = None
         self.standby_video_path = None
         self.youtube_rtmp_url = None
+        self.youtube_ready = None # 后台YouTube初始化的结果 (concurrent.futures.Future)
         
     def start(self):
         """启动控制器主循环。"""
@@ -59,10 +75,13 @@ class AppController:
         self.logger.log("🛑 [控制器] 收到停止指令，正在优雅地关闭所有进程...")
         self.current_state = AppState.STOPPING
         self.is_running = False
-        self.ffmpeg.stop_stream()
+        self.scanner.stop()
+        self.health.stop()
+        self.ffmpeg.shutdown()
         if self.main_thread:
             self.main_thread.join(timeout=10)
             self.logger.log("✅ [控制器] 主控制线程已退出。")
+        self.health.stop() # 主线程可能在上面的 stop 之后才刚启动健康检查
         self.current_state = AppState.IDLE
         if self.gui: self.gui.update_status_display(self.current_state, self)
 
@@ -107,6 +126,23 @@ class AppController:
         # ====================================================================
 
         self.standby_video_path = self.config.get('Douyin', 'standby_video_path')
+
+        # 配置了备用播放列表时，优先使用播放列表（生成的 concat 列表文件）
+        playlist_spec = self.config.get_section('Douyin').get('standby_playlist')
+        if playlist_spec:
+            playlist_path = self.playlist.build(playlist_spec)
+            if playlist_path:
+                self.standby_video_path = playlist_path
+            else:
+                self.logger.log("⚠️ [控制器] 备用播放列表不可用，将回退到 standby_video_path。")
+
+        # 配置了待机图片时使用静态图片待机模式（优先于备用视频和播放列表），CPU占用最低
+        standby_image = self.config.get_section('Douyin').get('standby_image_path')
+        if standby_image:
+            if os.path.isfile(standby_image):
+                self.standby_video_path = standby_image
+            else:
+                self.logger.log(f"⚠️ [控制器] 待机图片不存在: {standby_image}，将使用备用视频。")
         
         if not self.douyin_ids:
             self.logger.log("❌ [控制器] 致命错误：抖音ID列表为空，请在 yt.ini 中配置。")
@@ -115,66 +151,197 @@ class AppController:
         if not self.standby_video_path:
             self.logger.log("❌ [控制器] 致命错误：未配置备用视频路径，无法实现故障转移。")
             return AppState.STOPPING
+        self.ffmpeg.prepare_standby(self.standby_video_path)
 
-        stream_id, self.youtube_rtmp_url = self.youtube.get_or_create_stream()
-        if not self.youtube_rtmp_url:
-            self.logger.log("❌ [控制器] 致命错误：无法从YouTube获取推流地址。")
-            return AppState.STOPPING
-        
-        if not self.youtube.create_and_bind_broadcast(stream_id):
-             self.logger.log("❌ [控制器] 致命错误：创建或绑定YouTube直播活动失败。")
-             return AppState.STOPPING
-        
+        # YouTube初始化（认证、获取推流地址、直播活动）与第一轮直播源扫描同时进行，
+        # 两者都完成后才开始推流，冷启动时间取两者中较长的一个，而不是两者之和
+        self.youtube_rtmp_url = None
+        self.youtube_ready = concurrent.futures.Future()
+        threading.Thread(target=self._setup_youtube, args=(self.youtube_ready,), daemon=True).start()
         return AppState.SCANNING
 
+    def _setup_youtube(self, future):
+        """
+        后台线程：获取YouTube推流地址并准备好直播活动，结果 (stream_id, rtmp_url) 写入 future，失败时为None。
+        这里不修改控制器的任何状态：用户可能已经停止（甚至重新启动了）控制器，结果由 _wait_for_youtube 取用。
+        """
+        try:
+            started_at = time.time()
+            stream_id, rtmp_url = self.youtube.get_or_create_stream()
+            if not rtmp_url:
+                self.logger.log("❌ [控制器] 致命错误：无法从YouTube获取推流地址。")
+                future.set_result(None); return
+
+            if not self.youtube.get_or_create_broadcast(stream_id):
+                self.logger.log("❌ [控制器] 致命错误：创建或绑定YouTube直播活动失败。")
+                future.set_result(None); return
+
+            self.logger.log(f"✅ [控制器] YouTube初始化完成，耗时 {time.time() - started_at:.1f} 秒。")
+            future.set_result((stream_id, rtmp_url))
+        except Exception as e:
+            self.logger.log(f"❌ [控制器] 致命错误：YouTube初始化时发生异常: {e}")
+            future.set_result(None)
+
+    def _wait_for_youtube(self) -> bool:
+        """
+        等待后台的YouTube初始化完成。第一次完成时保存推流地址并启动健康检查；
+        之后再调用会立即返回。初始化失败或控制器停止时返回False。
+        """
+        if self.youtube_rtmp_url:
+            return True
+        future = self.youtube_ready
+        if not future.done():
+            self.logger.log("⏳ [控制器] 直播源扫描已完成，正在等待YouTube初始化...")
+        while self.is_running:
+            try:
+                result = future.result(timeout=1)
+            except concurrent.futures.TimeoutError:
+                continue
+            if not result or not self.is_running:
+                return False
+            stream_id, self.youtube_rtmp_url = result
+            self.health.start(stream_id)
+            return True
+        return False
+
     def _handle_scanning(self):
         """扫描状态：轮询抖音ID列表，寻找正在直播的源。"""
-        for douyin_id in self.douyin_ids:
-            if not self.is_running: return AppState.STOPPING
-            
-            self.current_douyin_url = self.finder.get_douyin_stream_url(douyin_id)
-            if self.current_douyin_url:
-                return AppState.STREAMING_LIVE
-        
+        douyin_id, url = self._scan_sources()
+        if not self.is_running: return AppState.STOPPING
+        if not self._wait_for_youtube(): return AppState.STOPPING
+
+        if url:
+            self.current_douyin_id, self.current_douyin_url = douyin_id, url
+            return AppState.STREAMING_LIVE
+
         return AppState.STREAMING_STANDBY
 
+    def _scan_workers(self):
+        return int(self.config.get_section('Douyin').get('scan_workers', 1))
+
+    def _scan_sources(self):
+        """按 douyin_ids 的优先级扫描一轮直播源，scan_workers 大于1时并发解析。"""
+        return self.finder.find_first_live(
+            self.douyin_ids, self._scan_workers(), lambda: self.is_running, lambda i, u: self.scheduler.record(i, bool(u))
+        )
+
+    def _next_event(self, timeout):
+        """从事件队列中取出一个事件，超时返回None。"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _drain_events(self):
+        """丢弃队列中残留的过期事件。"""
+        while self._next_event(timeout=0) is not None:
+            pass
+
+    def _health_reason(self, event: HealthEvent, can_step_down: bool) -> str | None:
+        """记录健康事件；需要处理时返回重启推流的原因（可以降档时先降一档）。"""
+        if event.action is None:
+            self.logger.log(f"🩺 [控制器] YouTube推流{event.describe()}。")
+            return None
+        self.logger.log(f"🩺 [控制器] YouTube推流状况持续不佳：{event.describe()}。")
+        if event.action == 'step_down' and can_step_down:
+            step = self.ffmpeg.step_down_quality()
+            if step:
+                return f"YouTube报告推流跟不上实时，画质阶梯降档：{step}"
+            return "YouTube报告推流跟不上实时且无法再降档，重启推流"
+        return "YouTube报告收不到推流数据，重启推流"
+
     def _handle_streaming_live(self):
         """推流直播状态：启动FFmpeg推流抖音源，并监控进程。"""
         process = self.ffmpeg.start_stream(self.current_douyin_url, self.youtube_rtmp_url, is_standby=False)
         
         if process:
-            while self.is_running and process.poll() is None:
-                time.sleep(2) 
+            self.health.notify_switch()
+            stall_reason = quality_reason = health_reason = None
+            while self.is_running and process.poll() is None and self.ffmpeg.output_alive():
+                stall_reason = self.ffmpeg.check_stall()
+                if stall_reason: break
+                quality_reason = self.ffmpeg.adjust_quality()
+                if quality_reason: break
+                event = self._next_event(timeout=2)
+                if isinstance(event, HealthEvent):
+                    health_reason = self._health_reason(event, can_step_down=True)
+                    if health_reason: break
             
             if not self.is_running: return AppState.STOPPING
 
+            if quality_reason:
+                self.logger.log(f"🎚️ [控制器] 画质阶梯换档：{quality_reason}。正在按新档位重启编码...")
+                self.ffmpeg.stop_stream()
+                return AppState.STREAMING_LIVE
+
+            if health_reason:
+                self.logger.log(f"🔁 [控制器] {health_reason}，正在重启直播推流...")
+                self.ffmpeg.stop_stream()
+                return AppState.STREAMING_LIVE
+
+            # 看门狗判定卡死，或常驻输出进程退出时，输入进程仍在运行，需要一并清理
+            if stall_reason:
+                self.logger.log(f"🐶 [控制器] 看门狗判定直播推流卡死：{stall_reason}，正在故障转移...")
+            self.ffmpeg.stop_stream()
+
+            # 卡死通常是CDN不再发送数据，缓存的地址很可能已经失效
+            if stall_reason:
+                self.finder.invalidate(self.current_douyin_id)
+
+            # 同一个源短暂崩溃时，在缓存有效期内直接用缓存的地址重启，无需重新解析；
+            # 缓存的地址已失效时重启会失败，下面的 else 分支会清除缓存并重新扫描
+            url = self.finder.get_douyin_stream_url(self.current_douyin_id)
+            if url:
+                self.logger.log(f"🔁 [控制器] 直播源 {self.current_douyin_id} 仍可用，正在重新启动推流...")
+                self.current_douyin_url = url
+                return AppState.STREAMING_LIVE
             return AppState.STREAMING_STANDBY
         else:
+            self.finder.invalidate(self.current_douyin_id)
             time.sleep(5) 
             return AppState.SCANNING
 
     def _handle_streaming_standby(self):
-        """推流备用视频状态：循环推流本地视频，并定时在后台扫描新源。"""
+        """推流备用视频状态：循环推流本地视频，由后台扫描器寻找新源，本循环只响应事件和进程退出。"""
         process = self.ffmpeg.start_stream(self.standby_video_path, self.youtube_rtmp_url, is_standby=True)
         
         if process:
-            check_interval = int(self.config.get('Douyin', 'check_interval', 60))
-            last_check_time = time.time()
-
-            while self.is_running and process.poll() is None:
-                if time.time() - last_check_time > check_interval:
-                    for douyin_id in self.douyin_ids:
-                        if not self.is_running: break
-                        url = self.finder.get_douyin_stream_url(douyin_id)
-                        if url:
-                            self.current_douyin_url = url
+            self.health.notify_switch()
+            make_before_break = str(self.config.get_section('FFmpeg').get('make_before_break', 'true')).lower() == 'true'
+            self._drain_events()
+            self.scanner.start(self.douyin_ids, self.scheduler, self._scan_workers())
+
+            stall_reason = None
+            try:
+                while self.is_running and process.poll() is None and self.ffmpeg.output_alive():
+                    stall_reason = self.ffmpeg.check_stall()
+                    if stall_reason: break
+                    event = self._next_event(timeout=1)
+                    if isinstance(event, HealthEvent):
+                        health_reason = self._health_reason(event, can_step_down=False)
+                        if health_reason:
+                            self.logger.log(f"🔁 [控制器] {health_reason}，正在重启备用视频推流...")
                             self.ffmpeg.stop_stream()
-                            return AppState.STREAMING_LIVE
-                    last_check_time = time.time()
-                time.sleep(1)
+                            return AppState.STREAMING_STANDBY
+                    elif isinstance(event, SourceEvent):
+                        # 先接后断：确认新源能出画面后，才终止正在推流的备用视频
+                        if make_before_break and not self.ffmpeg.probe_input(event.url):
+                            self.finder.invalidate(event.douyin_id)
+                            continue
+                        self.ffmpeg.prepare_input(event.url) # 备用视频仍在推流时完成编码探测
+                        self.current_douyin_id, self.current_douyin_url = event.douyin_id, event.url
+                        self.ffmpeg.stop_stream()
+                        return AppState.STREAMING_LIVE
+            finally:
+                self.scanner.stop()
 
             if not self.is_running: return AppState.STOPPING
 
+            if stall_reason:
+                self.logger.log(f"🐶 [控制器] 看门狗判定备用视频推流卡死：{stall_reason}，将重新扫描直播源。")
+            else:
+                self.logger.log("⚠️ [控制器] 备用视频推流进程意外退出，将重新扫描直播源。")
+            self.ffmpeg.stop_stream()
             return AppState.SCANNING
         else:
             self.logger.log("❌ [控制器] 启动备用视频推流失败！请检查视频文件路径和FFmpeg配置。")
@@ -0,0 +1,139 @@
+# encoder_probe.py
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+class EncoderProbe:
+    """
+    一次性探测各视频编码器在本机是否可用（对每个编码器做一次极小的测试编码），
+    以及FFmpeg是否支持某些较新的命令行选项（如 4.4 才加入的 -stats_period），
+    结果缓存到本地JSON文件，并以FFmpeg程序的路径和修改时间作为键：
+    只有更换或升级了FFmpeg，才会重新探测。
+    “不可用”的结果只保留 NEGATIVE_TTL 秒：硬件编码器可能只是暂时不可用（例如NVENC会话数已满），过期后重新测试。
+    """
+    ENCODER_CODECS = {
+        'nvenc': 'h264_nvenc',
+        'qsv': 'h264_qsv',
+        'cpu': 'libx264',
+    }
+    NEGATIVE_TTL = 3600
+
+    def __init__(self, logger, cache_path='encoder_cache.json'):
+        self.logger = logger
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+
+    def _load_cache(self) -> dict:
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.log(f"⚠️ [编码器探测] 读取缓存文件 {self.cache_path} 失败: {e}，将重新探测。")
+            return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_path, 'w') as f:
+                json.dump(self._cache, f, indent=2)
+        except Exception as e:
+            self.logger.log(f"⚠️ [编码器探测] 保存缓存文件 {self.cache_path} 失败: {e}")
+
+    @staticmethod
+    def _binary_key(ffmpeg_path: str) -> str | None:
+        """返回 FFmpeg 程序的缓存键 (绝对路径 + 修改时间)，找不到程序时返回None。"""
+        resolved = shutil.which(ffmpeg_path) or ffmpeg_path
+        try:
+            return f"{os.path.abspath(resolved)}|{os.path.getmtime(resolved)}"
+        except OSError:
+            return None
+
+    def is_available(self, encoder: str, ffmpeg_path: str) -> bool:
+        """
+        判断某个编码器是否可用，首次查询时进行测试编码并缓存结果。
+
+        Args:
+            encoder (str): encoder_preference 中的编码器名称，如 'nvenc'、'qsv'、'cpu'。
+            ffmpeg_path (str): FFmpeg 程序路径。
+
+        Returns:
+            bool: 编码器可用时返回True。未知编码器或无法定位FFmpeg时也返回True，交由实际推流来判断。
+        """
+        codec = self.ENCODER_CODECS.get(encoder)
+        key = self._binary_key(ffmpeg_path)
+        if not codec or not key:
+            return True
+
+        with self._lock:
+            encoders = self._binary_cache(key).setdefault('encoders', {})
+            entry = encoders.get(encoder)
+            if isinstance(entry, bool): # 旧版本的缓存格式
+                entry = {'available': entry, 'checked_at': 0}
+            if entry is None or (not entry['available'] and time.time() - entry['checked_at'] >= self.NEGATIVE_TTL):
+                entry = {'available': self._test_encode(ffmpeg_path, codec), 'checked_at': time.time()}
+                encoders[encoder] = entry
+                self._save_cache()
+            return entry['available']
+
+    def supports_option(self, option: str, ffmpeg_path: str) -> bool:
+        """
+        判断 FFmpeg 是否支持某个命令行选项（不带前导 '-'，如 'stats_period'），首次查询时读取 `-h full` 并缓存结果。
+        无法定位或运行FFmpeg时返回True，交由实际推流来判断。
+        """
+        key = self._binary_key(ffmpeg_path)
+        if not key:
+            return True
+
+        with self._lock:
+            options = self._binary_cache(key).setdefault('options', {})
+            if option not in options:
+                supported = self._has_option(ffmpeg_path, option)
+                if supported is None:
+                    return True
+                options[option] = supported
+                self._save_cache()
+            return options[option]
+
+    def _binary_cache(self, key: str) -> dict:
+        """更换或升级了FFmpeg时清空全部缓存结果。"""
+        if self._cache.get('binary') != key:
+            self._cache = {'binary': key, 'encoders': {}, 'options': {}}
+        return self._cache
+
+    def _has_option(self, ffmpeg_path: str, option: str) -> bool | None:
+        try:
+            result = subprocess.run([ffmpeg_path, "-hide_banner", "-h", "full"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, encoding='utf-8', errors='ignore', timeout=20)
+        except Exception as e:
+            self.logger.log(f"⚠️ [编码器探测] 读取FFmpeg支持的选项失败: {e}")
+            return None
+        supported = f"-{option} " in result.stdout
+        if not supported:
+            self.logger.log(f"ℹ️ [编码器探测] 当前FFmpeg版本不支持 -{option} 选项。")
+        return supported
+
+    def _test_encode(self, ffmpeg_path: str, codec: str) -> bool:
+        """用纯色测试画面编码几帧到空输出，判断编码器能否正常工作。"""
+        cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error",
+               "-f", "lavfi", "-i", "color=c=black:s=256x144:r=30",
+               "-frames:v", "5", "-c:v", codec, "-f", "null", "-"]
+        self.logger.log(f"🔬 [编码器探测] 正在测试编码器 {codec} 是否可用...")
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore', timeout=20)
+        except subprocess.TimeoutExpired:
+            self.logger.log(f"⚠️ [编码器探测] 测试编码器 {codec} 超时，视为不可用。")
+            return False
+        except Exception as e:
+            self.logger.log(f"⚠️ [编码器探测] 测试编码器 {codec} 时发生异常: {e}，视为不可用。")
+            return False
+
+        if result.returncode == 0:
+            self.logger.log(f"✅ [编码器探测] 编码器 {codec} 可用。")
+            return True
+        self.logger.log(f"ℹ️ [编码器探测] 编码器 {codec} 不可用: {result.stderr.strip()}")
+        return False
@@ -1,6 +1,14 @@
 # ffmpeg_manager.py (v4 - Keyframe Optimization Edition)
 import subprocess
 import time
+from output_muxer import OutputMuxer
+from ffmpeg_monitor import FFmpegMonitor
+from encoder_probe import EncoderProbe
+from standby_assets import StandbyAssetCache
+from media_probe import MediaProbe
+from standby_playlist import concat_input_args, is_still_image
+from quality_ladder import QualityLadder
+from process_tuning import ProcessTuning
 
 class FFmpegManager:
     """负责构建和管理FFmpeg推流进程，具有更健壮的参数配置和代理支持。"""
@@ -9,81 +17,481 @@ class FFmpegManager:
         self.logger = logger
         self.config = config_manager
         self.process = None
+        self.monitor = None
+        self.muxer = OutputMuxer(logger, config_manager)
+        self.encoder_probe = EncoderProbe(logger)
+        self.media_probe = MediaProbe(logger, config_manager)
+        self.standby_assets = StandbyAssetCache(logger, config_manager, self.media_probe, self._video_filters)
+        self.ladder = QualityLadder(logger, config_manager)
+        self.tuning = ProcessTuning(logger, config_manager)
+        self.current_encoder = None
+
+    def _persistent_output_enabled(self) -> bool:
+        return str(self.config.get_section('FFmpeg').get('persistent_output', 'false')).lower() == 'true'
+
+    def _relay_profile(self) -> dict | None:
+        """
+        常驻输出模式下所有输入阶段统一使用的输出规格。常驻输出进程以直通方式转发，
+        FLV 只在连接开始时发送一次编码参数，切换来源时分辨率、帧率或音频参数变化会让YouTube端解码出错，
+        因此每个输入阶段都必须重编码为同一规格（不直通）。非常驻模式返回None。
+        """
+        if not self._persistent_output_enabled():
+            return None
+        height = self._max_output_height() or 720
+        return {'width': round(height * 16 / 9 / 2) * 2, 'height': height, 'fps': self._max_output_fps() or 30,
+                'sample_rate': 44100, 'channels': 2}
+
+    def _relay_video_filters(self, profile: dict) -> list:
+        """把任意输入统一为 profile 的分辨率（等比缩放后加黑边）、帧率和像素格式。"""
+        width, height = profile['width'], profile['height']
+        scaler = self.config.get_section('FFmpeg').get('scaler', 'bicubic')
+        return [f"fps={profile['fps']:g}",
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease:flags={scaler}",
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2", "setsar=1", "format=yuv420p"]
+
+    def _extra_output_urls(self) -> list:
+        """额外的推流目标（备用推流码或其他平台），与YouTube共享同一次编码。"""
+        raw = self.config.get_section('FFmpeg').get('extra_output_urls', [])
+        urls = raw.split(',') if isinstance(raw, str) else raw
+        return [str(url).strip() for url in urls if str(url).strip()]
+
+    def _build_output_args(self, youtube_rtmp_url: str) -> list:
+        """
+        构建推流到YouTube的输出参数（含代理设置）。
+        配置了 extra_output_urls 时使用 tee 分发器：一次解码和编码，同时推送到多个目标。
+        额外目标设置 onfail=ignore，失败不会影响其他目标；YouTube 目标设置 onfail=abort，
+        它断开时整个进程退出，由控制器重启推流重新连接（否则其他目标仍在推流，进度看起来一切正常）。
+        """
+        extra_urls = self._extra_output_urls()
+        if extra_urls:
+            self.logger.log(f"📤 [FFmpeg] 多路分发模式：同一路编码将推送到 {len(extra_urls) + 1} 个目标。")
+            targets = [f"[f=flv:onfail=abort]{youtube_rtmp_url}"] + [f"[f=flv:onfail=ignore]{url}" for url in extra_urls]
+            # flv 分发时需要把编码参数写入全局头
+            args = ["-flags", "+global_header", "-f", "tee", "|".join(targets)]
+        else:
+            args = ["-f", "flv", youtube_rtmp_url]
+        proxy_url = self.config.get('Proxy', 'proxy_url')
+        if proxy_url:
+            self.logger.log(f"✅ [FFmpeg] 检测到代理设置，正在为推流添加代理参数: {proxy_url}")
+            args.extend(["-rtmp_proxy", proxy_url])
+        return args
+
+    def _stderr_buffer_lines(self) -> int:
+        return int(self.config.get_section('FFmpeg').get('stderr_buffer_lines', 200))
+
+    def get_stats(self):
+        """返回当前推流进程最近的编码统计信息 (FFmpegStats)，没有推流时返回None。"""
+        monitor = self.monitor
+        return monitor.get_stats() if monitor else None
+
+    def recent_output(self, lines: int = 20) -> str:
+        """返回当前推流进程 stderr 中最近的若干行日志。"""
+        monitor = self.monitor
+        return monitor.recent_output(lines) if monitor else ""
+
+    def _max_output_height(self) -> int:
+        return int(self.config.get_section('FFmpeg').get('max_output_height', 0))
+
+    def _max_output_fps(self) -> float:
+        return float(self.config.get_section('FFmpeg').get('max_output_fps', 0))
+
+    def _output_fps(self, info: dict | None) -> float:
+        """重编码后的输出帧率：输入源的帧率，超过 max_output_fps 时取上限。"""
+        fps = info.get('fps') if info else None
+        if not fps or fps > 240:
+            fps = 30
+            self.logger.log(f"⚠️ [FFmpeg] 无法探测输入源帧率，按 {fps}fps 计算关键帧间隔。")
+        max_fps = self._max_output_fps()
+        return min(fps, max_fps) if max_fps > 0 else fps
+
+    def _gop_frames(self, fps: float) -> int:
+        """根据输出帧率和 keyframe_interval_sec 计算GOP帧数。"""
+        interval = float(self.config.get_section('FFmpeg').get('keyframe_interval_sec', 2))
+        gop_frames = max(1, round(fps * interval))
+        self.logger.log(f"🎯 [FFmpeg] 输出帧率 {fps:.2f}fps，关键帧间隔 {interval:g} 秒 = {gop_frames} 帧。")
+        return gop_frames
+
+    def _video_filters(self, info: dict | None, rung: dict | None) -> list:
+        """
+        输出规格归一化：只有输入源超过配置的最大分辨率或最大帧率时，才缩放或降低帧率。
+        分辨率上限取 max_output_height 与画质阶梯当前档位中较小的一个。
+        """
+        filters = []
+        max_fps = self._max_output_fps()
+        source_fps = info.get('fps') if info else None
+        if max_fps > 0 and source_fps and source_fps > max_fps + 0.01:
+            filters.append(f"fps={max_fps:g}") # 先降帧，后续的缩放和编码都只处理保留下来的帧
+
+        limits = [self._max_output_height(), rung['max_height'] if rung else 0]
+        limits = [limit for limit in limits if limit > 0]
+        if limits:
+            max_height = min(limits)
+            scaler = self.config.get_section('FFmpeg').get('scaler', 'bicubic')
+            source_height = info.get('height') if info else None
+            if not source_height:
+                # 无法探测分辨率时，交给FFmpeg在运行时判断：只缩小不放大
+                filters.append(f"scale=-2:'min(ih,{max_height})':flags={scaler}")
+            elif source_height > max_height:
+                filters.append(f"scale=-2:{max_height}:flags={scaler}")
+
+        if filters:
+            self.logger.log(f"📐 [FFmpeg] 输出规格归一化: {','.join(filters)}")
+        return filters
+
+    def _still_image_inputs(self, image_path: str) -> list:
+        """
+        静态图片待机的输入参数：图片以极低帧率循环作为视频，
+        配置了 standby_audio_path 时循环播放该音频，否则生成静音音轨（YouTube要求推流包含音频）。
+        """
+        fps = float(self.config.get_section('FFmpeg').get('standby_image_fps', 5))
+        args = ["-re", "-loop", "1", "-framerate", f"{fps:g}", "-i", image_path]
+        audio_path = self.config.get_section('Douyin').get('standby_audio_path')
+        if audio_path:
+            args.extend(["-re", "-stream_loop", "-1", "-i", audio_path])
+        else:
+            args.extend(["-re", "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"])
+        return args + ["-map", "0:v:0", "-map", "1:a:0"]
+
+    def _still_image_video_args(self) -> list:
+        """
+        静态图片待机的视频编码参数：画面不变，用单线程 libx264 的 stillimage 调优、
+        极低帧率和很小的码率编码，关键帧间隔仍按 keyframe_interval_sec 保证YouTube可以接收。
+        """
+        section = self.config.get_section('FFmpeg')
+        fps = float(section.get('standby_image_fps', 5))
+        bitrate = section.get('standby_image_bitrate', '300k')
+        profile = self._relay_profile()
+        if profile:
+            # 常驻输出模式：与其他输入阶段保持同一规格，画面不变的帧由 fps 滤镜重复，编码代价仍然很小
+            gop_frames = self._gop_frames(profile['fps'])
+            return ["-c:v", "libx264", "-preset", "veryfast", "-tune", "stillimage", "-threads", "1", "-profile:v", "high",
+                    "-vf", ",".join(self._relay_video_filters(profile)),
+                    "-b:v", bitrate, "-maxrate", bitrate, "-bufsize", bitrate,
+                    "-g", str(gop_frames), "-keyint_min", str(gop_frames)]
+        max_height = self._max_output_height()
+        scaler = section.get('scaler', 'bicubic')
+        # libx264 的 yuv420p 要求宽高都是偶数，同时只缩小不放大
+        height = f"'trunc(min(ih,{max_height})/2)*2'" if max_height > 0 else "trunc(ih/2)*2"
+        gop_frames = self._gop_frames(fps)
+        return ["-c:v", "libx264", "-preset", "veryfast", "-tune", "stillimage", "-threads", "1", "-pix_fmt", "yuv420p",
+                "-vf", f"scale=-2:{height}:flags={scaler}", "-r", f"{fps:g}",
+                "-b:v", bitrate, "-maxrate", bitrate, "-bufsize", bitrate,
+                "-g", str(gop_frames), "-keyint_min", str(gop_frames)]
+
+    # YouTube RTMP (FLV) 推流可以直接接收的编码参数
+    COPY_VIDEO_CODECS = ('h264',)
+    COPY_VIDEO_PROFILES = ('baseline', 'constrained baseline', 'main', 'high')
+    COPY_PIX_FMTS = ('yuv420p', 'yuvj420p')
+    COPY_AUDIO_CODECS = ('aac',)
+    COPY_SAMPLE_RATES = (44100, 48000)
+
+    def _copy_max_bitrate(self) -> int:
+        """解析 copy_max_bitrate（如 8000k、8M 或 8000000），返回 bit/s；0 表示不限制，格式错误时也按不限制处理。"""
+        raw = str(self.config.get_section('FFmpeg').get('copy_max_bitrate', '0')).strip().lower()
+        multiplier = {'k': 1000, 'm': 1000_000}.get(raw[-1:], 1)
+        try:
+            return int(float(raw.rstrip('km') or 0) * multiplier)
+        except ValueError:
+            self.logger.log(f"⚠️ [FFmpeg] copy_max_bitrate 格式无效: '{raw}'，应为 8000k 或 8M 这样的值，将不限制直通码率。")
+            return 0
+
+    def _check_copy_compatibility(self, info: dict) -> tuple[bool, bool, str]:
+        """
+        判断输入源能否直接直通推流到YouTube。
+
+        Returns:
+            tuple[bool, bool, str]: (视频能否直通, 音频能否直通, 判断理由)
+        """
+        reasons = []
+        if info.get('video_codec') not in self.COPY_VIDEO_CODECS:
+            reasons.append(f"视频编码为 {info.get('video_codec')}")
+        if info.get('profile') and info['profile'].lower() not in self.COPY_VIDEO_PROFILES:
+            reasons.append(f"H.264 profile 为 {info['profile']}")
+        if info.get('pix_fmt') and info['pix_fmt'] not in self.COPY_PIX_FMTS:
+            reasons.append(f"像素格式为 {info['pix_fmt']}")
+        if (info.get('width') or 0) > 3840 or (info.get('height') or 0) > 2160:
+            reasons.append(f"分辨率 {info.get('width')}x{info.get('height')} 超过 4K")
+        # 输出规格上限：超过的源必须重编码，否则直通会原样推出高分辨率/高帧率
+        max_height, max_fps = self._max_output_height(), self._max_output_fps()
+        if max_height > 0 and (info.get('height') or 0) > max_height:
+            reasons.append(f"分辨率 {info.get('height')}p 超过 max_output_height={max_height}")
+        if max_fps > 0 and (info.get('fps') or 0) > max_fps + 0.01:
+            reasons.append(f"帧率 {info['fps']:.2f} 超过 max_output_fps={max_fps:g}")
+        max_bps = self._copy_max_bitrate()
+        source_bps = info.get('video_bitrate') or info.get('bitrate')
+        if max_bps and source_bps and source_bps > max_bps:
+            reasons.append(f"码率 {source_bps // 1000}k 超过 copy_max_bitrate={max_bps // 1000}k")
+        video_ok = not reasons
+
+        audio_ok = True
+        if info.get('audio_codec') and (info['audio_codec'] not in self.COPY_AUDIO_CODECS or
+                                        (info.get('sample_rate') and info['sample_rate'] not in self.COPY_SAMPLE_RATES)):
+            audio_ok = False
+            reasons.append(f"音频为 {info['audio_codec']}/{info.get('sample_rate')}Hz，需要转码为AAC")
+
+        summary = f"{info.get('video_codec')}/{info.get('profile')} {info.get('width')}x{info.get('height')} {info.get('pix_fmt')}, 音频 {info.get('audio_codec')}"
+        return video_ok, audio_ok, f"{summary}。" + ("；".join(reasons) if reasons else "全部参数符合YouTube推流要求")
+
+    def _choose_encoders(self, stream_input: str, preferences: list) -> tuple[list, bool]:
+        """
+        根据输入源的编码探测结果，自动决定直通还是重编码。
+
+        Returns:
+            tuple[list, bool]: (按尝试顺序排列的编码器列表, 音频能否直通)
+        """
+        preferences = [p.strip().lower() for p in preferences if p.strip()]
+        if str(self.config.get_section('FFmpeg').get('auto_copy', 'false')).lower() != 'true':
+            return preferences, True
+
+        info = self.media_probe.probe(stream_input)
+        if not info:
+            self.logger.log("⚠️ [FFmpeg] 无法探测输入源编码，按 encoder_preference 的顺序尝试。")
+            return preferences, True
+
+        video_ok, audio_ok, reason = self._check_copy_compatibility(info)
+        encoders = [p for p in preferences if p != 'copy']
+        if video_ok:
+            self.logger.log(f"🧠 [FFmpeg] 自动决策：直通 (Copy)。输入源 {reason}")
+            return ['copy'] + encoders, audio_ok
+        if not encoders:
+            encoders = ['cpu']
+        self.logger.log(f"🧠 [FFmpeg] 自动决策：重编码 ({','.join(encoders)})。输入源 {reason}")
+        return encoders, audio_ok
+
+    def prepare_input(self, stream_input: str):
+        """
+        在停止当前推流之前预先探测新输入源的编码参数（结果缓存在 MediaProbe 中），
+        这样 start_stream 决定直通/重编码和计算滤镜时不需要再等待 ffprobe，切换时的断流时间更短。
+        """
+        self.media_probe.probe(stream_input)
+
+    def _standby_precompute_enabled(self) -> bool:
+        # 预转码的备用视频以直通方式推流，常驻输出模式要求统一重编码，用不上
+        return (str(self.config.get_section('FFmpeg').get('standby_precompute', 'false')).lower() == 'true'
+                and not self._persistent_output_enabled())
+
+    def prepare_standby(self, standby_video_path: str):
+        """提前在后台准备预转码的备用视频，使第一次进入待机时就有机会直接使用直通模式。"""
+        if self._standby_precompute_enabled() and not is_still_image(standby_video_path):
+            self.standby_assets.get_asset(standby_video_path)
+
+    def check_stall(self) -> str | None:
+        """看门狗：检查当前推流是否卡死（进程仍在但画面不再前进，或速度长期低于实时）。"""
+        monitor = self.monitor
+        if not monitor:
+            return None
+        stall_timeout = float(self.config.get_section('FFmpeg').get('stall_timeout', 15))
+        slow_grace = float(self.config.get_section('FFmpeg').get('slow_speed_grace', 30))
+        return monitor.stall_reason(stall_timeout, slow_grace)
+
+    def adjust_quality(self) -> str | None:
+        """
+        根据编码统计评估画质阶梯，需要换档时返回原因（调用方应重启编码以应用新档位）。
+        直通 (copy) 推流不参与画质调整。
+        """
+        if not self.process or self.current_encoder in (None, 'copy', 'still'):
+            return None
+        return self.ladder.evaluate(self.get_stats())
+
+    def step_down_quality(self) -> str | None:
+        """立即把画质阶梯降一档，返回换档说明（调用方应重启编码以应用新档位）；无法降档时返回None。"""
+        if not self.process or self.current_encoder in (None, 'copy', 'still'):
+            return None
+        return self.ladder.step_down()
+
+    def output_alive(self) -> bool:
+        """常驻输出模式下，检查持有YouTube连接的输出进程是否仍在运行；非常驻模式总是返回True。"""
+        return not self._persistent_output_enabled() or self.muxer.is_alive()
 
     def start_stream(self, stream_input: str, youtube_rtmp_url: str, is_standby: bool = False) -> subprocess.Popen | None:
         ffmpeg_path = self.config.get('FFmpeg', 'ffmpeg_path', 'ffmpeg')
         preferences = self.config.get('FFmpeg', 'encoder_preference', 'copy,nvenc,cpu').split(',')
 
-        base_cmd = [ffmpeg_path, "-hide_banner"]
-        if is_standby or 'http' not in stream_input:
-            base_cmd.extend(["-re"])
-        if is_standby:
-            base_cmd.extend(["-stream_loop", "-1"])
-        
-        base_cmd.extend(["-i", stream_input])
+        startup_timeout = float(self.config.get_section('FFmpeg').get('startup_timeout', 10))
+
+        # 备用视频已有预转码版本时，直接以直通模式循环推流，无需实时编码
+        standby_copy = False
+        still_image = is_standby and is_still_image(stream_input)
+        if still_image:
+            # 静态图片待机：只有一种编码方式，不参与编码器选择
+            self.logger.log(f"🖼️ [FFmpeg] 使用静态图片待机: {stream_input}")
+            preferences = ['still']
+        elif is_standby and self._standby_precompute_enabled():
+            asset = self.standby_assets.get_asset(stream_input)
+            if asset:
+                self.logger.log(f"♻️ [FFmpeg] 使用预转码的备用视频直通推流: {asset}")
+                stream_input, preferences, standby_copy = asset, ['copy'], True
+            else:
+                self.logger.log("ℹ️ [FFmpeg] 预转码的备用视频尚未就绪，本次仍实时编码。")
+
+        # 通过 -progress 输出机器可读的进度信息，用于判断推流是否真正建立
+        base_cmd = [ffmpeg_path, "-hide_banner", "-progress", "pipe:1"]
+        if self.encoder_probe.supports_option('stats_period', ffmpeg_path):
+            base_cmd.extend(["-stats_period", "0.25"]) # FFmpeg 4.4 起支持；旧版本按默认的每0.5秒报告一次进度
+        if still_image:
+            base_cmd.extend(self._still_image_inputs(stream_input))
+        else:
+            if is_standby or 'http' not in stream_input:
+                base_cmd.extend(["-re"])
+            if is_standby:
+                base_cmd.extend(["-stream_loop", "-1"])
+            if '://' in stream_input:
+                # 网络输入：断线自动重连，并设置读写超时，避免CDN不再发送数据时FFmpeg无限期等待
+                rw_timeout = int(float(self.config.get_section('FFmpeg').get('input_rw_timeout', 10)) * 1_000_000)
+                if stream_input.startswith('http'):
+                    base_cmd.extend(["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "4"])
+                base_cmd.extend(["-rw_timeout", str(rw_timeout)])
+
+            base_cmd.extend(concat_input_args(stream_input))
+            base_cmd.extend(["-i", stream_input])
+            if self._extra_output_urls() and not self._persistent_output_enabled():
+                # tee 分发器要求显式指定要输出的流
+                base_cmd.extend(["-map", "0:v:0", "-map", "0:a:0?"])
+
+        if self._persistent_output_enabled():
+            # 常驻输出模式：输入进程只推到本地，由常驻输出进程保持与YouTube的连接
+            if not self.muxer.ensure_running(youtube_rtmp_url, self._build_output_args(youtube_rtmp_url), self._stderr_buffer_lines()):
+                self.logger.log("❌ [FFmpeg] 常驻输出进程不可用，无法启动推流。"); return None
+            target_args = ["-output_ts_offset", f"{self.muxer.timestamp_offset():.3f}", "-f", "mpegts", self.muxer.input_target()]
+        else:
+            target_args = self._build_output_args(youtube_rtmp_url)
 
+        audio_copy_ok = True
+        relay_profile = self._relay_profile()
+        if relay_profile:
+            # 常驻输出模式：所有输入阶段统一重编码，不直通
+            preferences = [p for p in preferences if p.strip().lower() != 'copy'] or ['cpu']
+            audio_copy_ok = False
+            self.logger.log(f"📐 [FFmpeg] 常驻输出模式，统一输出规格 {relay_profile['width']}x{relay_profile['height']} "
+                            f"{relay_profile['fps']:g}fps，音频 {relay_profile['sample_rate']}Hz/{relay_profile['channels']}声道。")
+        elif not is_standby:
+            preferences, audio_copy_ok = self._choose_encoders(stream_input, preferences)
+
+        encode_video_args = None # 仅在需要重编码时才探测输入源并计算滤镜和GOP
+        rung = None if still_image else self.ladder.current()
+        if rung:
+            self.logger.log(f"🎚️ [FFmpeg] 画质阶梯当前为 {self.ladder.describe(rung)}。")
         for encoder in preferences:
             encoder = encoder.strip().lower()
+            if not self.encoder_probe.is_available(encoder, ffmpeg_path):
+                self.logger.log(f"⏭️ [FFmpeg] 编码器 '{encoder}' 在本机不可用（已缓存的探测结果），直接跳过。")
+                continue
             cmd = list(base_cmd)
             encoder_name = ""
 
-            if encoder == 'copy' and not is_standby:
+            if encoder == 'still':
+                encoder_name = "静态图片 (libx264)"; cmd.extend(self._still_image_video_args())
+            elif encoder == 'copy' and (not is_standby or standby_copy):
                 encoder_name = "直通 (Copy)"; cmd.extend(["-c:v", "copy"])
             elif encoder == 'nvenc':
                 encoder_name = "NVIDIA NVENC"; preset = self.config.get_section('FFmpeg').get('nvenc_preset', 'p5'); cmd.extend(["-c:v", "h264_nvenc", "-preset", preset])
             elif encoder == 'qsv':
                 encoder_name = "Intel QSV"; preset = self.config.get_section('FFmpeg').get('qsv_preset', 'fast'); cmd.extend(["-c:v", "h264_qsv", "-preset", preset])
             elif encoder == 'cpu':
-                encoder_name = "CPU (libx264)"; preset = self.config.get_section('FFmpeg').get('cpu_preset', 'veryfast'); threads = self.config.get_section('FFmpeg').get('cpu_threads', '4'); cmd.extend(["-c:v", "libx264", "-preset", preset, "-threads", threads, "-pix_fmt", "yuv420p"])
+                encoder_name = "CPU (libx264)"; preset = rung['preset'] if rung else self.config.get_section('FFmpeg').get('cpu_preset', 'veryfast'); threads = self.tuning.thread_count(); cmd.extend(["-c:v", "libx264", "-preset", preset, "-threads", threads, "-pix_fmt", "yuv420p"])
             else:
                 if encoder == 'copy' and is_standby: self.logger.log("ℹ️ [FFmpeg] 备用视频推流跳过 'copy' 选项，因其需要重新编码以循环。")
                 continue
 
             audio_codec = self.config.get('FFmpeg', 'c_a', 'copy')
-            if audio_codec == 'copy' and not is_standby:
+            if standby_copy or (audio_codec == 'copy' and not is_standby and audio_copy_ok):
                  cmd.extend(["-c:a", "copy"])
             else:
                 cmd.extend(["-c:a", "aac"]); audio_bitrate = self.config.get('FFmpeg', 'b_a', '128k')
                 if audio_bitrate: cmd.extend(["-b:a", audio_bitrate])
                 cmd.extend(["-ar", "44100"])
+                if relay_profile: cmd.extend(["-ac", str(relay_profile['channels'])])
 
             # --- 视频码率和其他参数 (仅在重编码时应用) ---
-            if encoder != 'copy':
-                bitrate = self.config.get('FFmpeg', 'bitrate', '4000k')
+            if encoder not in ('copy', 'still'):
+                bitrate = rung['bitrate'] if rung else self.config.get('FFmpeg', 'bitrate', '4000k')
                 if bitrate: cmd.extend(["-b:v", bitrate, "-maxrate", bitrate, "-bufsize", "8000k"])
-                
-                # ====================================================================
-                #                      【最终修复的关键】
-                # ====================================================================
-                # 强制设定关键帧间隔 (GOP size)。YouTube推荐2-4秒。
-                # 对于60fps的视频，120帧就是2秒一个关键帧，非常理想。
-                # 这是一个对直播流非常重要的参数。
-                cmd.extend(["-g", "120"])
-                # ====================================================================
-
-            cmd.extend(["-f", "flv", youtube_rtmp_url])
-
-            proxy_url = self.config.get('Proxy', 'proxy_url')
-            if proxy_url:
-                self.logger.log(f"✅ [FFmpeg] 检测到代理设置，正在为推流添加代理参数: {proxy_url}")
-                cmd.extend(["-rtmp_proxy", proxy_url])
+
+                if encode_video_args is None and relay_profile:
+                    # 固定规格：画质阶梯只调整预设和码率，不改变分辨率
+                    gop_frames = self._gop_frames(relay_profile['fps'])
+                    encode_video_args = ["-profile:v", "high", "-vf", ",".join(self._relay_video_filters(relay_profile)),
+                                         "-g", str(gop_frames), "-keyint_min", str(gop_frames)]
+                if encode_video_args is None:
+                    source_info = self.media_probe.probe(stream_input)
+                    filters = self._video_filters(source_info, rung)
+                    encode_video_args = ["-vf", ",".join(filters)] if filters else []
+
+                    # ====================================================================
+                    #                      【最终修复的关键】
+                    # ====================================================================
+                    # 强制设定关键帧间隔 (GOP size)。YouTube推荐2-4秒。
+                    # 按实际输出帧率换算：GOP帧数 = 帧率 x keyframe_interval_sec，
+                    # 这样无论源是25fps还是60fps，关键帧间隔都是固定的秒数。
+                    # 这是一个对直播流非常重要的参数。
+                    gop_frames = self._gop_frames(self._output_fps(source_info))
+                    encode_video_args.extend(["-g", str(gop_frames), "-keyint_min", str(gop_frames)])
+                    # ====================================================================
+                cmd.extend(encode_video_args)
+
+            cmd.extend(target_args)
 
             self.logger.log(f"🚀 [FFmpeg] 正在尝试使用 [{encoder_name}] 模式启动推流...")
             self.logger.log(f"   -> 执​​行的命令: {' '.join(cmd)}")
+            self.logger.log(f"   -> 进程调度: {self.tuning.describe()}")
 
             try:
-                self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore')
-                time.sleep(5)
-                if self.process.poll() is None:
-                    self.logger.log(f"✅ [FFmpeg] 使用 [{encoder_name}] 成功启动进程！PID: {self.process.pid}")
+                started_at = time.time()
+                self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore', **self.tuning.popen_kwargs())
+                self.tuning.apply(self.process)
+                self.monitor = FFmpegMonitor(self.process, self._stderr_buffer_lines(), float(self.config.get_section('FFmpeg').get('min_speed', 0.9)))
+                result = self.monitor.wait_until_ready(startup_timeout)
+                if result == 'ready':
+                    self.logger.log(f"✅ [FFmpeg] 使用 [{encoder_name}] 成功启动推流，耗时 {time.time() - started_at:.1f} 秒！PID: {self.process.pid}")
+                    self.current_encoder = encoder
+                    self.ladder.on_stream_started()
                     return self.process
+                elif result == 'timeout':
+                    self.logger.log(f"❌ [FFmpeg] 使用 [{encoder_name}] 启动后 {startup_timeout:g} 秒内仍未输出画面，判定启动失败。最近的输出: {self.monitor.recent_output(5)}")
+                    self.stop_stream()
                 else:
-                    error_output = self.process.stderr.read(); self.logger.log(f"❌ [FFmpeg] 使用 [{encoder_name}] 启动失败。FFmpeg 错误: {error_output}"); self.process = None
+                    error_output = self.monitor.wait_for_exit_output(); self.logger.log(f"❌ [FFmpeg] 使用 [{encoder_name}] 启动失败。FFmpeg 错误: {error_output}"); self.process = None; self.monitor = None
             except FileNotFoundError: self.logger.log(f"❌ [FFmpeg] 严重错误：找不到 FFmpeg 程序！请检查路径配置: '{ffmpeg_path}'"); return None
             except Exception as e: self.logger.log(f"❌ [FFmpeg] 启动时发生未知异常: {e}"); return None
 
         self.logger.log("❌ [FFmpeg] 所有编码器都尝试失败，无法启动推流。"); return None
 
+    def probe_input(self, stream_input: str) -> bool:
+        """
+        在不触碰当前推流的前提下，试探性地打开输入源并确认其能解码出视频帧。
+        用于“先接后断”切换：确认新源可用之后，才终止正在推流的备用进程。
+
+        Args:
+            stream_input (str): 要试探的输入地址或文件路径。
+
+        Returns:
+            bool: 在超时时间内成功读取到指定数量的视频帧时返回True。
+        """
+        ffmpeg_path = self.config.get('FFmpeg', 'ffmpeg_path', 'ffmpeg')
+        frames = str(self.config.get_section('FFmpeg').get('input_probe_frames', '10'))
+        timeout = float(self.config.get_section('FFmpeg').get('input_probe_timeout', 8))
+        cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", stream_input,
+               "-map", "0:v:0", "-frames:v", frames, "-f", "null", "-"]
+
+        self.logger.log(f"🔍 [FFmpeg] 正在试探新输入源是否能输出画面 (最多 {timeout:g} 秒)...")
+        try:
+            probe = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore')
+        except FileNotFoundError: self.logger.log(f"❌ [FFmpeg] 严重错误：找不到 FFmpeg 程序！请检查路径配置: '{ffmpeg_path}'"); return False
+        except Exception as e: self.logger.log(f"❌ [FFmpeg] 试探输入源时发生未知异常: {e}"); return False
+
+        try:
+            _, error_output = probe.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            probe.kill(); probe.communicate()
+            self.logger.log(f"⚠️ [FFmpeg] 输入源在 {timeout:g} 秒内没有输出足够的画面，放弃切换。")
+            return False
+
+        if probe.returncode == 0:
+            self.logger.log("✅ [FFmpeg] 新输入源已确认可以正常输出画面。")
+            return True
+        self.logger.log(f"⚠️ [FFmpeg] 新输入源无法正常解码，放弃切换。FFmpeg 错误: {error_output.strip()}")
+        return False
+
     def stop_stream(self):
         if self.process and self.process.poll() is None:
             self.logger.log(f"🔪 [FFmpeg] 正在终止进程 PID: {self.process.pid}...")
@@ -93,3 +501,10 @@ class FFmpegManager:
             except subprocess.TimeoutExpired: self.logger.log("⚠️ [FFmpeg] kill后等待超时，进程可能未完全清理。")
             except Exception as e: self.logger.log(f"❌ [FFmpeg] 终止进程时发生错误: {e}")
         self.process = None
+        self.monitor = None
+        self.current_encoder = None
+
+    def shutdown(self):
+        """终止输入进程以及常驻输出进程（断开与YouTube的连接）。"""
+        self.stop_stream()
+        self.muxer.stop()
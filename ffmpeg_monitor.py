@@ -0,0 +1,182 @@
+# ffmpeg_monitor.py
+import threading
+import time
+from collections import deque
+
+class FFmpegStats:
+    """某一时刻的编码统计信息快照，由 -progress 输出解析而来。"""
+    def __init__(self, block: dict | None = None, updated_at: float | None = None):
+        block = block or {}
+        self.frame = _to_int(block.get('frame'))
+        self.fps = _to_float(block.get('fps'))
+        self.bitrate_kbps = _to_float(block.get('bitrate', '').replace('kbits/s', ''))
+        self.speed = _to_float(block.get('speed', '').rstrip('x'))
+        self.drop_frames = _to_int(block.get('drop_frames'))
+        self.dup_frames = _to_int(block.get('dup_frames'))
+        self.total_size = _to_int(block.get('total_size'))
+        # tee 等没有输出文件句柄的封装器不会报告输出大小 (total_size=N/A)
+        self.size_reported = block.get('total_size', 'N/A') != 'N/A'
+        self.out_time_sec = _to_int(block.get('out_time_us')) / 1_000_000
+        self.updated_at = updated_at
+        # FFmpeg 的 speed 是从进程启动起的累计平均值，一次短暂的卡顿会拉低它好几分钟；
+        # 这里另外记录最近一段时间内的实时速度（由 FFmpegMonitor 计算，0 表示数据还不够）
+        self.recent_speed = 0.0
+
+    def summary(self) -> str:
+        """用于界面显示的一行摘要。"""
+        return (f"{self.fps:.1f}fps | {self.bitrate_kbps:.0f}kbps | {self.recent_speed or self.speed:.2f}x | "
+                f"丢帧 {self.drop_frames} | 重复帧 {self.dup_frames} | {self.total_size / 1048576:.1f}MB")
+
+class FFmpegMonitor:
+    # 计算实时速度的滑动窗口（秒），以及窗口内至少需要覆盖的时长
+    SPEED_WINDOW = 10
+    MIN_SPEED_SPAN = 2
+
+    """
+    在后台线程中持续读取 FFmpeg 子进程的输出：
+    - stdout: `-progress pipe:1` 输出的机器可读进度信息，解析为 FFmpegStats；
+    - stderr: 持续排空，避免管道写满阻塞FFmpeg，并在环形缓冲区中保留最近的日志行用于诊断。
+    进度信息每个块以 `progress=continue` 或 `progress=end` 结尾，读完一个完整的块才会更新。
+    """
+
+    def __init__(self, process, stderr_lines: int = 200, min_speed: float = 0.9):
+        self.process = process
+        self.min_speed = min_speed # 编码速度（相对实时的倍数）低于该值视为跟不上
+        self.stats = FFmpegStats()
+        self.stderr_lines = deque(maxlen=stderr_lines)
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._last_size = 0
+        self._last_out_time = 0
+        self._speed_samples = deque() # [(墙上时间, 输出时间戳)]，用于计算滑动窗口内的速度
+        # 看门狗使用：最近一次帧数或输出字节数增长的时间，以及编码速度持续偏低的起始时间
+        self.last_advance_at = time.time()
+        self.slow_since = None
+        self.threads = []
+        if process.stdout is not None:
+            self.threads.append(threading.Thread(target=self._read_progress, daemon=True))
+        if process.stderr is not None:
+            self.threads.append(threading.Thread(target=self._drain_stderr, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def _read_progress(self):
+        block = {}
+        try:
+            for line in self.process.stdout:
+                key, sep, value = line.strip().partition('=')
+                if not sep: continue
+                block[key] = value.strip()
+                if key == 'progress':
+                    self._commit(block)
+                    block = {}
+        except Exception:
+            pass # 进程被终止时管道会被关闭，这里直接结束读取
+
+    def _drain_stderr(self):
+        try:
+            for line in self.process.stderr:
+                line = line.rstrip()
+                if line:
+                    with self._lock:
+                        self.stderr_lines.append(line)
+        except Exception:
+            pass
+
+    def _commit(self, block):
+        now = time.time()
+        stats = FFmpegStats(block, now)
+        stats.recent_speed = self._recent_speed(now, stats.out_time_sec)
+        with self._lock:
+            previous = self.stats
+            self.stats = stats
+            if stats.frame > previous.frame or stats.total_size > previous.total_size or stats.out_time_sec > previous.out_time_sec:
+                self.last_advance_at = now
+            if stats.recent_speed > 0 and stats.recent_speed < self.min_speed:
+                self.slow_since = self.slow_since or now
+            else:
+                self.slow_since = None
+        # 已有画面被编码封装，且输出字节数在持续增长，才认为推流真正建立；
+        # 不报告输出大小时（tee 多路分发），改为以输出时间戳持续前进为准
+        if stats.size_reported:
+            advancing = stats.total_size > self._last_size > 0
+        else:
+            advancing = stats.out_time_sec > self._last_out_time > 0
+        if stats.frame > 0 and advancing:
+            self._ready.set()
+        self._last_size = stats.total_size
+        self._last_out_time = stats.out_time_sec
+
+    def _recent_speed(self, now: float, out_time_sec: float) -> float:
+        """最近 SPEED_WINDOW 秒内输出时间戳的前进量 / 经过的墙上时间。"""
+        samples = self._speed_samples
+        samples.append((now, out_time_sec))
+        while len(samples) > 2 and now - samples[1][0] >= self.SPEED_WINDOW:
+            samples.popleft()
+        start_at, start_out = samples[0]
+        if now - start_at < self.MIN_SPEED_SPAN:
+            return 0.0
+        return max(0.0, (out_time_sec - start_out) / (now - start_at))
+
+    def stall_reason(self, stall_timeout: float, slow_grace: float) -> str | None:
+        """
+        判断推流是否“假死”：进程仍在运行，但画面已经不再前进，或编码速度长期跟不上实时。
+
+        Args:
+            stall_timeout (float): 帧数和输出字节数都不增长超过该秒数，判定为卡死。
+            slow_grace (float): 速度持续低于 min_speed 超过该秒数，判定为卡死。0 表示不检查速度。
+
+        Returns:
+            str | None: 判定卡死时返回原因描述，否则返回None。
+        """
+        now = time.time()
+        with self._lock:
+            idle = now - self.last_advance_at
+            slow_for = now - self.slow_since if self.slow_since else 0
+            speed = self.stats.recent_speed
+        if idle > stall_timeout:
+            return f"已有 {idle:.0f} 秒没有新的画面或输出数据"
+        if slow_grace > 0 and slow_for > slow_grace:
+            return f"最近 {self.SPEED_WINDOW} 秒的编码速度已连续 {slow_for:.0f} 秒低于 {self.min_speed}x（当前 {speed:.2f}x）"
+        return None
+
+    def get_stats(self) -> FFmpegStats:
+        """返回最近一次的统计信息快照（不可变对象，可直接读取）。"""
+        with self._lock:
+            return self.stats
+
+    def recent_output(self, lines: int = 20) -> str:
+        """返回 stderr 中最近的若干行，用于错误诊断。"""
+        with self._lock:
+            return '\n'.join(list(self.stderr_lines)[-lines:])
+
+    def wait_for_exit_output(self, timeout: float = 2, lines: int = 20) -> str:
+        """进程退出后，等待读取线程把剩余输出读完，再返回最近的日志。"""
+        for thread in self.threads:
+            thread.join(timeout)
+        return self.recent_output(lines)
+
+    def wait_until_ready(self, timeout: float) -> str:
+        """
+        等待推流就绪。
+
+        Returns:
+            str: 'ready' 表示已确认输出画面；'exited' 表示进程已退出；'timeout' 表示超时仍未就绪。
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._ready.wait(0.05): return 'ready'
+            if self.process.poll() is not None: return 'exited'
+        return 'ready' if self._ready.is_set() else 'timeout'
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -35,6 +35,7 @@ class AppGUI(ctk.CTk):
 
         self.create_widgets()
         self.log_updater()
+        self.stats_updater()
 
         # 绑定窗口关闭事件到正确的处理函数
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -79,8 +80,11 @@ class AppGUI(ctk.CTk):
         self.ffmpeg_label = ctk.CTkLabel(status_panel, text="FFmpeg PID: --", font=ctk.CTkFont(size=12))
         self.ffmpeg_label.grid(row=3, column=0, padx=15, pady=(0, 10), sticky="w")
 
+        self.stats_label = ctk.CTkLabel(status_panel, text="编码统计: --", font=ctk.CTkFont(size=12), wraplength=220, justify="left")
+        self.stats_label.grid(row=4, column=0, padx=15, pady=(0, 10), sticky="w")
+
         self.youtube_link_label = ctk.CTkLabel(status_panel, text="打开YouTube直播间", text_color="#5D9EFF", cursor="hand2")
-        self.youtube_link_label.grid(row=4, column=0, padx=15, pady=(0, 15), sticky="w")
+        self.youtube_link_label.grid(row=5, column=0, padx=15, pady=(0, 15), sticky="w")
         self.youtube_link_label.bind("<Button-1>", self.open_youtube_link)
         self.youtube_link_label.grid_remove() # 默认隐藏
 
@@ -137,6 +141,13 @@ class AppGUI(ctk.CTk):
         except queue.Empty: pass
         finally: self.after(100, self.log_updater)
 
+    def stats_updater(self):
+        """定时刷新编码统计信息。统计数据由后台线程持续解析，这里只读取最新快照。"""
+        try:
+            stats = self.ffmpeg_manager.get_stats()
+            self.stats_label.configure(text=f"编码统计: {stats.summary()}" if stats and stats.updated_at else "编码统计: --")
+        finally: self.after(1000, self.stats_updater)
+
     def start_app(self):
         self.logger.log("▶️ 用户点击了【开始运行】按钮。")
         self.start_button.configure(state="disabled")
@@ -0,0 +1,141 @@
+# media_probe.py
+import json
+import os
+import subprocess
+import threading
+from standby_playlist import concat_input_args
+
+class MediaProbe:
+    """
+    使用 ffprobe 读取媒体文件的编码信息（编码格式、分辨率、帧率、时长等）。
+    本地文件的结果缓存到磁盘，以“绝对路径 + 大小 + 修改时间”为键，文件不变就不会重复探测；
+    直播源地址的结果缓存在内存中，同一个地址重启推流时不会重复探测。
+    """
+
+    def __init__(self, logger, config_manager, cache_path='media_probe_cache.json'):
+        self.logger = logger
+        self.config = config_manager
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._file_cache = self._load_cache()
+        self._url_cache = {}
+
+    def _load_cache(self) -> dict:
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.log(f"⚠️ [媒体探测] 读取缓存文件 {self.cache_path} 失败: {e}，将重新探测。")
+            return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self._file_cache, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            self.logger.log(f"⚠️ [媒体探测] 保存缓存文件 {self.cache_path} 失败: {e}")
+
+    def _ffprobe_path(self) -> str:
+        """优先使用配置的 ffprobe_path，否则在 ffmpeg_path 的同一目录下寻找 ffprobe。"""
+        configured = self.config.get_section('FFmpeg').get('ffprobe_path')
+        if configured:
+            return configured
+        ffmpeg_path = self.config.get('FFmpeg', 'ffmpeg_path', 'ffmpeg')
+        directory, name = os.path.split(ffmpeg_path)
+        return os.path.join(directory, name.replace('ffmpeg', 'ffprobe')) if 'ffmpeg' in name else 'ffprobe'
+
+    def probe(self, stream_input: str) -> dict | None:
+        """探测输入源：本地文件走 probe_file，网络地址走 probe_url。"""
+        if '://' in stream_input:
+            return self.probe_url(stream_input)
+        return self.probe_file(stream_input)
+
+    def probe_url(self, url: str) -> dict | None:
+        """探测网络直播源，结果按地址缓存在内存中。"""
+        with self._lock:
+            if url in self._url_cache:
+                return self._url_cache[url]
+        timeout = float(self.config.get_section('FFmpeg').get('input_probe_timeout', 8))
+        info = self._run_ffprobe(url, timeout)
+        if info is not None:
+            with self._lock:
+                self._url_cache[url] = info
+        return info
+
+    def probe_file(self, path: str) -> dict | None:
+        """
+        探测本地媒体文件，结果会被缓存。
+
+        Returns:
+            dict | None: 见 _parse 的返回值；文件不存在或无法探测时返回None。
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}"
+
+        with self._lock:
+            if key in self._file_cache:
+                return self._file_cache[key]
+
+        info = self._run_ffprobe(path)
+        if info is not None:
+            with self._lock:
+                self._file_cache[key] = info
+                self._save_cache()
+        return info
+
+    def _run_ffprobe(self, target: str, timeout: float = 15) -> dict | None:
+        cmd = [self._ffprobe_path(), "-v", "error", "-print_format", "json", "-show_format", "-show_streams",
+               *concat_input_args(target), target]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore', timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.logger.log(f"⚠️ [媒体探测] 探测 {target} 超时。"); return None
+        except FileNotFoundError:
+            self.logger.log(f"❌ [媒体探测] 找不到 ffprobe 程序: '{cmd[0]}'，可在 [FFmpeg] ffprobe_path 中配置。"); return None
+        if result.returncode != 0:
+            self.logger.log(f"⚠️ [媒体探测] 无法探测 {target}: {result.stderr.strip()}"); return None
+        try:
+            return self._parse(json.loads(result.stdout))
+        except (ValueError, TypeError) as e:
+            self.logger.log(f"⚠️ [媒体探测] 无法解析 ffprobe 的输出: {e}"); return None
+
+    @staticmethod
+    def _parse(data: dict) -> dict:
+        """把 ffprobe 的 JSON 输出整理为我们关心的字段。"""
+        video = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'), {})
+        audio = next((s for s in data.get('streams', []) if s.get('codec_type') == 'audio'), {})
+        fmt = data.get('format', {})
+        return {
+            'video_codec': video.get('codec_name'),
+            'profile': video.get('profile'),
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'pix_fmt': video.get('pix_fmt'),
+            'fps': _parse_rate(video.get('avg_frame_rate')) or _parse_rate(video.get('r_frame_rate')),
+            'video_bitrate': _to_int(video.get('bit_rate')),
+            'audio_codec': audio.get('codec_name'),
+            'sample_rate': _to_int(audio.get('sample_rate')),
+            'channels': audio.get('channels'),
+            'duration': float(fmt.get('duration') or 0),
+            'bitrate': _to_int(fmt.get('bit_rate')),
+        }
+
+def _parse_rate(rate: str | None) -> float | None:
+    """把 ffprobe 的帧率字符串（如 '30000/1001'）转为浮点数。"""
+    try:
+        num, _, den = (rate or '').partition('/')
+        value = float(num) / float(den or 1)
+        return value if value > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,97 @@
+# output_muxer.py
+import subprocess
+import time
+from ffmpeg_monitor import FFmpegMonitor
+from process_tuning import ProcessTuning
+
+class OutputMuxer:
+    """
+    常驻的输出进程：独占与YouTube之间唯一的RTMP连接。
+    短生命周期的输入进程（直播源或备用视频）把MPEG-TS推到本地UDP端口，
+    由本进程直通转发到YouTube，切换输入源时RTMP连接不会断开。
+    """
+
+    def __init__(self, logger, config_manager):
+        self.logger = logger
+        self.config = config_manager
+        self.tuning = ProcessTuning(logger, config_manager)
+        self.process = None
+        self.monitor = None
+        self.output_url = None
+        self.started_at = None
+
+    def _port(self) -> int:
+        return int(self.config.get_section('FFmpeg').get('relay_port', 23000))
+
+    def input_target(self) -> str:
+        """输入进程应当推送到的本地地址。"""
+        return f"udp://127.0.0.1:{self._port()}?pkt_size=1316"
+
+    def timestamp_offset(self) -> float:
+        """
+        新输入进程的时间戳偏移（秒）。每个输入进程的时间戳都从0开始，
+        按输出进程已运行的时长整体后移，保证输出端的时间戳单调递增。
+        """
+        return time.time() - self.started_at if self.started_at else 0.0
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ensure_running(self, output_url: str, output_args: list, stderr_lines: int = 200) -> bool:
+        """
+        确保输出进程正在向 output_url 推流，必要时（首次、进程退出或地址变化）重新启动。
+
+        Args:
+            output_url (str): 推流目标地址，仅用于判断是否需要重启。
+            output_args (list): 输出部分的FFmpeg参数，例如 ["-f", "flv", url]。
+            stderr_lines (int): 保留的最近 stderr 日志行数。
+
+        Returns:
+            bool: 输出进程处于运行状态时返回True。
+        """
+        if self.is_alive() and self.output_url == output_url:
+            return True
+        self.stop()
+
+        ffmpeg_path = self.config.get('FFmpeg', 'ffmpeg_path', 'ffmpeg')
+        cmd = [ffmpeg_path, "-hide_banner", "-nostats", "-loglevel", "error",
+               "-fflags", "+genpts+discardcorrupt",
+               "-f", "mpegts", "-i", f"udp://127.0.0.1:{self._port()}?fifo_size=1000000&overrun_nonfatal=1",
+               "-map", "0", "-c", "copy"]
+        cmd.extend(output_args)
+
+        self.logger.log("📡 [输出] 正在启动常驻输出进程，保持与YouTube的RTMP连接...")
+        self.logger.log(f"   -> 执​​行的命令: {' '.join(cmd)}")
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore', **self.tuning.popen_kwargs())
+            self.tuning.apply(self.process)
+            self.monitor = FFmpegMonitor(self.process, stderr_lines)
+        except FileNotFoundError: self.logger.log(f"❌ [输出] 严重错误：找不到 FFmpeg 程序！请检查路径配置: '{ffmpeg_path}'"); return False
+        except Exception as e: self.logger.log(f"❌ [输出] 启动常驻输出进程时发生未知异常: {e}"); return False
+
+        # 输出进程要等收到第一个输入包后才会连接RTMP，这里只确认它没有立即退出
+        time.sleep(0.5)
+        if self.process.poll() is not None:
+            error_output = self.monitor.wait_for_exit_output()
+            self.logger.log(f"❌ [输出] 常驻输出进程启动失败。FFmpeg 错误: {error_output}")
+            self.process = None
+            self.monitor = None
+            return False
+
+        self.output_url = output_url
+        self.started_at = time.time()
+        self.logger.log(f"✅ [输出] 常驻输出进程已启动！PID: {self.process.pid}，本地输入端口: {self._port()}")
+        return True
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.logger.log(f"🔪 [输出] 正在终止常驻输出进程 PID: {self.process.pid}...")
+            try:
+                self.process.kill(); self.process.wait(timeout=5)
+                self.logger.log("✅ [输出] 常驻输出进程已终止。")
+            except subprocess.TimeoutExpired: self.logger.log("⚠️ [输出] kill后等待超时，进程可能未完全清理。")
+            except Exception as e: self.logger.log(f"❌ [输出] 终止进程时发生错误: {e}")
+        self.process = None
+        self.monitor = None
+        self.output_url = None
+        self.started_at = None
@@ -0,0 +1,114 @@
+# poll_scheduler.py
+import json
+import os
+import threading
+import time
+
+HOURS_PER_WEEK = 7 * 24
+
+class PollScheduler:
+    """
+    按每个主播的历史记录自适应地安排轮询时间：
+    - 主播持续未开播时，轮询间隔按指数退避逐步拉长（不超过 max_poll_interval）；
+    - 在该主播以往开播过的“每周时段”附近，使用更短的 hot_poll_interval；
+    - 所有主播共享一个全局的每分钟解析次数预算，超出预算的检查顺延到下一轮。
+    关闭 adaptive_polling 时，所有主播统一按 check_interval 轮询，与旧行为一致。
+    """
+
+    def __init__(self, logger, config_manager, history_path='poll_history.json'):
+        self.logger = logger
+        self.config = config_manager
+        self.history_path = history_path
+        self._lock = threading.Lock()
+        self._next_due = {}   # {douyin_id: 下次检查的时间戳}，只保存在内存中
+        self._history = self._load_history()
+        self._tokens = None
+        self._tokens_updated_at = time.time()
+
+    def _load_history(self) -> dict:
+        if not os.path.exists(self.history_path):
+            return {}
+        try:
+            with open(self.history_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.log(f"⚠️ [调度器] 读取轮询历史 {self.history_path} 失败: {e}，将重新积累。")
+            return {}
+
+    def _save_history(self):
+        try:
+            with open(self.history_path, 'w') as f:
+                json.dump(self._history, f, indent=2)
+        except Exception as e:
+            self.logger.log(f"⚠️ [调度器] 保存轮询历史 {self.history_path} 失败: {e}")
+
+    def _setting(self, key, default) -> float:
+        return float(self.config.get_section('Douyin').get(key, default))
+
+    def _adaptive(self) -> bool:
+        return str(self.config.get_section('Douyin').get('adaptive_polling', 'false')).lower() == 'true'
+
+    @staticmethod
+    def _hour_of_week(timestamp: float) -> int:
+        local = time.localtime(timestamp)
+        return local.tm_wday * 24 + local.tm_hour
+
+    def _is_hot(self, record: dict, now: float) -> bool:
+        """当前时间的前后一小时内，该主播以往是否开播过。"""
+        live_hours = record.get('live_hours', {})
+        hour = self._hour_of_week(now)
+        return any(str((hour + offset) % HOURS_PER_WEEK) in live_hours for offset in (-1, 0, 1))
+
+    def _interval_for(self, douyin_id: str, now: float) -> float:
+        check_interval = self._setting('check_interval', 60)
+        if not self._adaptive():
+            return check_interval
+
+        record = self._history.get(douyin_id, {})
+        if self._is_hot(record, now):
+            return self._setting('hot_poll_interval', 20)
+        misses = min(record.get('misses', 0), 16)
+        max_interval = self._setting('max_poll_interval', 900)
+        return min(check_interval * (2 ** misses), max_interval)
+
+    def _take_tokens(self, wanted: int, now: float) -> int:
+        """从全局预算（令牌桶，容量为每分钟的解析次数）中取出最多 wanted 个令牌。"""
+        budget = self._setting('poll_budget_per_minute', 0)
+        if budget <= 0 or not self._adaptive():
+            return wanted
+        if self._tokens is None:
+            self._tokens = budget
+        self._tokens = min(budget, self._tokens + (now - self._tokens_updated_at) * budget / 60)
+        self._tokens_updated_at = now
+        granted = min(wanted, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def due_ids(self, douyin_ids: list) -> list:
+        """
+        返回当前应当检查的抖音ID（保持 douyin_ids 中的优先级顺序），受全局预算限制。
+        从未检查过的ID视为立即到期。
+        """
+        now = time.time()
+        with self._lock:
+            due = [douyin_id for douyin_id in douyin_ids if self._next_due.get(douyin_id, 0) <= now]
+            granted = self._take_tokens(len(due), now)
+            if granted < len(due):
+                self.logger.log(f"⏳ [调度器] 已达到每分钟解析预算，本轮只检查 {granted}/{len(due)} 个到期的ID。")
+            return due[:granted]
+
+    def record(self, douyin_id: str, is_live: bool):
+        """记录一次检查结果，并据此安排该ID的下一次检查时间。"""
+        now = time.time()
+        with self._lock:
+            record = self._history.setdefault(douyin_id, {})
+            if is_live:
+                record['misses'] = 0
+                live_hours = record.setdefault('live_hours', {})
+                hour = str(self._hour_of_week(now))
+                live_hours[hour] = live_hours.get(hour, 0) + 1
+            else:
+                record['misses'] = record.get('misses', 0) + 1
+            interval = self._interval_for(douyin_id, now)
+            self._next_due[douyin_id] = now + interval
+            self._save_history()
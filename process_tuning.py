@@ -0,0 +1,146 @@
+# process_tuning.py
+import ctypes
+import os
+import sys
+
+# Windows 进程优先级类 (用于 creationflags)
+ABOVE_NORMAL_PRIORITY_CLASS = 0x00008000
+BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+IDLE_PRIORITY_CLASS = 0x00000040
+# 后台任务（如备用视频预转码）使用的 nice 值：最低优先级
+BACKGROUND_NICE = 19
+PROCESS_SET_INFORMATION = 0x0200
+PROCESS_QUERY_INFORMATION = 0x0400
+
+def available_cores() -> int:
+    """当前进程可以使用的CPU核心数（Linux 下会考虑容器/taskset 限制）。"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def parse_cpu_set(spec) -> list:
+    """把 '0-3,6' 这样的核心列表解析为 [0, 1, 2, 3, 6]；格式错误时抛出 ValueError。"""
+    items = spec.split(',') if isinstance(spec, str) else (spec or [])
+    cores = set()
+    for item in items:
+        item = str(item).strip()
+        if not item:
+            continue
+        start, _, end = item.partition('-')
+        first, last = int(start), int(end or start)
+        if first < 0 or last < first:
+            raise ValueError(f"无效的核心范围 '{item}'")
+        cores.update(range(first, last + 1))
+    return sorted(cores)
+
+class ProcessTuning:
+    """
+    FFmpeg 子进程的CPU调度设置：限定可用的CPU核心、降低调度优先级，
+    并按可用核心数自动决定编码线程数（预留一部分核心给界面、控制器和源扫描）。
+    POSIX 系统在子进程启动后立即设置 nice 和核心绑定（不使用 preexec_fn，
+    它在多线程程序中可能导致子进程在 exec 之前死锁）；
+    Windows 通过 creationflags 设置优先级类，启动后再设置核心绑定。
+    background=True 用于不影响推流的后台任务，一律使用最低优先级。
+    """
+
+    def __init__(self, logger, config_manager):
+        self.logger = logger
+        self.config = config_manager
+
+    def cpu_set(self) -> list:
+        """配置的 cpu_affinity 核心列表；未配置或格式错误时返回空列表（不限制）。"""
+        spec = self.config.get_section('FFmpeg').get('cpu_affinity', '')
+        try:
+            cores = parse_cpu_set(spec)
+        except ValueError as e:
+            self.logger.log(f"⚠️ [进程调度] cpu_affinity 配置无效: {e}，将不限制CPU核心。")
+            return []
+        total = os.cpu_count() or 1
+        invalid = [core for core in cores if core >= total]
+        if invalid:
+            self.logger.log(f"⚠️ [进程调度] cpu_affinity 中的核心 {invalid} 不存在（本机共 {total} 个核心），已忽略。")
+        return [core for core in cores if core < total]
+
+    def nice_level(self) -> int:
+        try:
+            return int(self.config.get_section('FFmpeg').get('ffmpeg_nice', 0))
+        except (TypeError, ValueError):
+            self.logger.log("⚠️ [进程调度] ffmpeg_nice 必须是整数，将使用默认优先级。")
+            return 0
+
+    def thread_count(self) -> str:
+        """
+        libx264 的编码线程数。cpu_threads 为数字时直接使用；为 auto（默认）时，
+        取可用核心数（或 cpu_affinity 中的核心数）减去 cpu_reserve_cores，至少为1。
+        """
+        section = self.config.get_section('FFmpeg')
+        configured = str(section.get('cpu_threads', 'auto')).strip().lower()
+        if configured.isdigit() and int(configured) > 0:
+            return configured
+        try:
+            reserve = max(0, int(section.get('cpu_reserve_cores', 1)))
+        except (TypeError, ValueError):
+            reserve = 1
+        cores = len(self.cpu_set()) or available_cores()
+        return str(max(1, cores - reserve))
+
+    def describe(self) -> str:
+        cores = self.cpu_set()
+        return f"nice={self.nice_level()}, CPU核心={','.join(map(str, cores)) if cores else '不限制'}"
+
+    def popen_kwargs(self, background: bool = False) -> dict:
+        """返回传给 subprocess.Popen 的额外参数（只有 Windows 的优先级类需要在创建进程时指定）。"""
+        if sys.platform != 'win32':
+            return {}
+        nice = BACKGROUND_NICE if background else self.nice_level()
+        if nice >= 15: return {'creationflags': IDLE_PRIORITY_CLASS}
+        if nice > 0: return {'creationflags': BELOW_NORMAL_PRIORITY_CLASS}
+        if nice < 0: return {'creationflags': ABOVE_NORMAL_PRIORITY_CLASS}
+        return {}
+
+    def apply(self, process, background: bool = False):
+        """进程启动后立即调用，设置 nice（仅 POSIX）和CPU核心绑定。失败时保持默认设置，不影响推流。"""
+        if process is None:
+            return
+        if sys.platform == 'win32':
+            self._apply_windows_affinity(process.pid)
+            return
+
+        nice, cores = (BACKGROUND_NICE if background else self.nice_level()), self.cpu_set()
+        if not nice and not cores:
+            return
+        # Linux 上优先级和核心绑定是按线程设置的，新线程会继承创建它的线程的设置；
+        # 进程刚启动时 FFmpeg 通常还没有创建工作线程，这里仍对已存在的线程逐个设置
+        task_dir = f"/proc/{process.pid}/task"
+        try:
+            thread_ids = [int(tid) for tid in os.listdir(task_dir)] if os.path.isdir(task_dir) else [process.pid]
+        except OSError:
+            thread_ids = [process.pid]
+        try:
+            for tid in thread_ids:
+                if nice:
+                    os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + nice)
+                if cores and hasattr(os, 'sched_setaffinity'):
+                    os.sched_setaffinity(tid, cores)
+        except ProcessLookupError:
+            pass # 进程已经退出
+        except OSError as e:
+            self.logger.log(f"⚠️ [进程调度] 设置 FFmpeg 的优先级或CPU核心绑定失败: {e}")
+
+    def _apply_windows_affinity(self, pid: int):
+        cores = self.cpu_set()
+        if not cores:
+            return
+        mask = sum(1 << core for core in cores)
+        try:
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
+            if not handle:
+                raise OSError(f"OpenProcess 失败，错误码 {kernel32.GetLastError()}")
+            try:
+                if not kernel32.SetProcessAffinityMask(handle, ctypes.c_size_t(mask)):
+                    raise OSError(f"SetProcessAffinityMask 失败，错误码 {kernel32.GetLastError()}")
+            finally:
+                kernel32.CloseHandle(handle)
+        except Exception as e:
+            self.logger.log(f"⚠️ [进程调度] 设置 FFmpeg 的CPU核心绑定失败: {e}")
@@ -0,0 +1,144 @@
+# quality_ladder.py
+import time
+
+DEFAULT_LADDER = "veryfast:3000k:720,superfast:2000k:720,ultrafast:1200k:480"
+# libx264 预设从快到慢；降档时预设只能不变或更快，否则跟不上的编码器反而更慢
+X264_PRESETS = ('ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow', 'placebo')
+# 升档失败后退避的最大倍数
+MAX_STEP_UP_BACKOFF = 32
+
+class QualityLadder:
+    """
+    自适应画质阶梯：每一档由 (CPU预设, 码率, 最大高度) 组成，第0档画质最高。
+    第0档就是 [FFmpeg] 中常规的 cpu_preset 和 bitrate（高度只受 max_output_height 限制），
+    quality_ladder 中配置的是依次降低的各档。
+    编码速度持续低于实时或持续丢帧时降一档；长时间稳定后尝试升一档。
+    直播源没有 -re 也受源的实时速率限制，编码速度看不出余量，因此升档后很快又降档时，
+    下一次升档前的等待时间加倍，避免在负载过高的机器上反复升档、降档（每次换档都要重启推流）。
+    阶梯只影响重编码，直通 (copy) 推流不受影响。
+    """
+
+    def __init__(self, logger, config_manager):
+        self.logger = logger
+        self.config = config_manager
+        self.index = 0
+        self._last_step = None      # 最近一次换档的方向：'up' 或 'down'
+        self._step_up_failures = 0  # 升档后没撑住又降档的连续次数
+        self._warned = set()
+        self._reset_window()
+
+    def _reset_window(self):
+        now = time.time()
+        self.changed_at = now
+        self.trouble_since = None
+        self._drop_baseline = None
+
+    def enabled(self) -> bool:
+        return str(self.config.get_section('FFmpeg').get('adaptive_quality', 'false')).lower() == 'true'
+
+    def rungs(self) -> list:
+        """第0档（常规设置）加上配置中的降档阶梯，格式: 预设:码率:最大高度，多档之间用英文逗号分隔。"""
+        section = self.config.get_section('FFmpeg')
+        raw = section.get('quality_ladder', DEFAULT_LADDER)
+        items = raw.split(',') if isinstance(raw, str) else raw
+        rungs = [{'preset': section.get('cpu_preset', 'veryfast'), 'bitrate': section.get('bitrate', '4000k'), 'max_height': 0}]
+        for item in items:
+            parts = [part.strip() for part in str(item).split(':')]
+            if len(parts) != 3 or not parts[2].isdigit():
+                self.logger.log(f"⚠️ [画质阶梯] 忽略格式错误的阶梯项: '{item}'，应为 预设:码率:最大高度")
+                continue
+            preset = parts[0]
+            above = rungs[-1]['preset']
+            if preset in X264_PRESETS and above in X264_PRESETS and X264_PRESETS.index(preset) > X264_PRESETS.index(above):
+                if item not in self._warned:
+                    self._warned.add(item)
+                    self.logger.log(f"⚠️ [画质阶梯] 阶梯项 '{item}' 的预设 {preset} 比上一档的 {above} 更慢，降档时将沿用 {above}。")
+                preset = above
+            rungs.append({'preset': preset, 'bitrate': parts[1], 'max_height': int(parts[2])})
+        return rungs
+
+    def current(self) -> dict | None:
+        """当前档位；未启用或阶梯为空时返回None（使用 [FFmpeg] 中的常规设置）。"""
+        if not self.enabled():
+            return None
+        rungs = self.rungs()
+        if not rungs:
+            return None
+        self.index = min(self.index, len(rungs) - 1)
+        return rungs[self.index]
+
+    def describe(self, rung: dict | None = None) -> str:
+        rung = rung or self.current()
+        if not rung:
+            return "常规设置"
+        height = f"{rung['max_height']}p" if rung['max_height'] else "max_output_height"
+        return f"第{self.index + 1}档 ({rung['preset']} / {rung['bitrate']} / {height})"
+
+    def on_stream_started(self):
+        """每次（重新）启动推流后调用，重新开始统计观察窗口。"""
+        self._reset_window()
+
+    def step_down(self) -> str | None:
+        """外部要求降档（例如 YouTube 报告推流跟不上实时）。已在最低档或未启用时返回None。"""
+        rungs = self.rungs() if self.enabled() else []
+        if self.index >= len(rungs) - 1:
+            return None
+        return self._shift(rungs, 1)
+
+    def _shift(self, rungs: list, delta: int) -> str:
+        """换档（delta=1 降档，-1 升档），返回换档说明。"""
+        old = self.describe(rungs[self.index])
+        if delta > 0 and self._last_step == 'up':
+            self._step_up_failures += 1 # 刚升上来的档位没撑住，下次升档前等待更久
+        self._last_step = 'down' if delta > 0 else 'up'
+        self.index += delta
+        self._reset_window()
+        return f"{old} -> {self.describe(rungs[self.index])}"
+
+    def _step_up_wait(self, step_up_after: float) -> float:
+        return step_up_after * min(MAX_STEP_UP_BACKOFF, 2 ** self._step_up_failures)
+
+    def evaluate(self, stats) -> str | None:
+        """
+        根据最新的编码统计决定是否换档。
+
+        Args:
+            stats (FFmpegStats | None): 当前推流的编码统计快照。
+
+        Returns:
+            str | None: 换档时返回换档原因（调用方需要重启编码以应用新档位），否则返回None。
+        """
+        rungs = self.rungs() if self.enabled() else []
+        if not rungs or not stats or not stats.updated_at:
+            return None
+
+        now = time.time()
+        min_speed = float(self.config.get_section('FFmpeg').get('quality_min_speed', 0.97))
+        max_drops = int(self.config.get_section('FFmpeg').get('quality_max_drops', 30))
+        step_down_after = float(self.config.get_section('FFmpeg').get('quality_step_down_after', 20))
+        step_up_after = float(self.config.get_section('FFmpeg').get('quality_step_up_after', 600))
+
+        if self._drop_baseline is None:
+            self._drop_baseline = stats.drop_frames
+        drops = stats.drop_frames - self._drop_baseline
+
+        problem = None
+        # 使用最近一段时间的速度，而不是 FFmpeg 从启动起的累计平均速度，避免直播源短暂卡顿后长时间误判
+        if 0 < stats.recent_speed < min_speed:
+            problem = f"编码速度 {stats.recent_speed:.2f}x 低于 {min_speed}x"
+        elif drops > max_drops:
+            problem = f"本档位已丢帧 {drops} 帧，超过 {max_drops} 帧"
+
+        if problem:
+            self.trouble_since = self.trouble_since or now
+            if now - self.trouble_since >= step_down_after and self.index < len(rungs) - 1:
+                return f"{problem}，已持续 {step_down_after:g} 秒：{self._shift(rungs, 1)}"
+            return None
+
+        self.trouble_since = None
+        if self._last_step == 'up' and now - self.changed_at >= step_up_after:
+            self._last_step, self._step_up_failures = None, 0 # 升上来的档位已稳定运行，取消退避
+        wait = self._step_up_wait(step_up_after)
+        if self.index > 0 and now - self.changed_at >= wait:
+            return f"已稳定运行 {wait:g} 秒，尝试提升画质：{self._shift(rungs, -1)}"
+        return None
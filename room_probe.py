@@ -0,0 +1,77 @@
+# room_probe.py
+import json
+
+DEFAULT_ROOM_PROBE_URL = (
+    "https://live.douyin.com/webcast/room/web/enter/?aid=6383&app_name=douyin_web"
+    "&device_platform=web&browser_language=zh-CN&browser_platform=Win32"
+    "&browser_name=Chrome&browser_version=114.0.0.0&web_rid={douyin_id}"
+)
+
+class DouyinRoomProbe:
+    """
+    第一层的轻量检查：用一个带短超时的小请求查询抖音房间状态，判断房间是否正在直播。
+    只有这一层判断为“开播”或“无法判断”时，才需要进行完整的 Streamlink 解析。
+
+    传输层可以替换：transport(url, headers, timeout) -> (status_code, body_text)，
+    便于在本地用一个简单的HTTP服务代替抖音接口进行测试。
+    """
+    LIVE_STATUS = 2 # 房间接口中 status == 2 表示正在直播
+    UNKNOWN_WARN_AFTER = 10 # 连续这么多次无法判断时提示检查接口
+
+    def __init__(self, logger, config_manager, transport=None):
+        self.logger = logger
+        self.config = config_manager
+        self.transport = transport or self._requests_transport
+        self._session = None
+        self._unknown_streak = 0
+
+    def _requests_transport(self, url: str, headers: dict, timeout: float):
+        """默认的传输层：复用同一个 requests 会话发送 GET 请求。"""
+        if self._session is None:
+            import requests # 只有使用默认传输层时才需要
+            self._session = requests.Session()
+        response = self._session.get(url, headers=headers, timeout=timeout)
+        return response.status_code, response.text
+
+    def is_live(self, douyin_id: str, headers: dict | None = None) -> bool | None:
+        """
+        查询指定房间是否正在直播。
+
+        Args:
+            douyin_id (str): 抖音房间ID。
+            headers (dict | None): 随请求发送的HTTP头。
+
+        Returns:
+            bool | None: True 表示正在直播，False 表示未开播，None 表示无法判断（请求失败或响应无法解析）。
+        """
+        result = self._query(douyin_id, headers)
+        if result is not None:
+            self._unknown_streak = 0
+            return result
+        self._unknown_streak += 1
+        if self._unknown_streak == self.UNKNOWN_WARN_AFTER:
+            self.logger.log(f"⚠️ [房间探测] 房间状态接口已连续 {self.UNKNOWN_WARN_AFTER} 次无法判断，每次检查都白白多一个请求。"
+                            "请检查 room_probe_url，或在 yt.ini 中设置 room_probe = false。")
+        return None
+
+    def _query(self, douyin_id: str, headers: dict | None) -> bool | None:
+        url_template = self.config.get_section('Douyin').get('room_probe_url') or DEFAULT_ROOM_PROBE_URL
+        timeout = float(self.config.get_section('Douyin').get('room_probe_timeout', 3))
+        url = url_template.format(douyin_id=douyin_id)
+
+        try:
+            status_code, body = self.transport(url, headers or {}, timeout)
+        except Exception as e:
+            self.logger.log(f"⚠️ [房间探测] [{douyin_id}] 状态请求失败: {e}，将直接进行完整解析。")
+            return None
+        if status_code != 200 or not body:
+            return None
+
+        try:
+            data = json.loads(body).get('data') or {}
+            rooms = data.get('data') or []
+            if rooms and 'status' in rooms[0]:
+                return int(rooms[0]['status']) == self.LIVE_STATUS
+        except (ValueError, AttributeError, TypeError):
+            pass
+        return None
@@ -0,0 +1,64 @@
+# source_scanner.py
+import threading
+import time
+
+class SourceEvent:
+    """扫描器发布给控制器的事件：某个抖音直播源正在直播。"""
+    def __init__(self, douyin_id: str, url: str):
+        self.douyin_id = douyin_id
+        self.url = url
+        self.created_at = time.time()
+
+class SourceScanner:
+    """后台直播源扫描器，按 PollScheduler 安排的节奏检查抖音ID，并通过事件队列通知控制器。"""
+
+    # 扫描线程询问调度器“哪些ID已到期”的间隔（秒）
+    TICK_INTERVAL = 5
+
+    def __init__(self, logger, stream_finder, event_queue):
+        """
+        初始化 SourceScanner。
+
+        Args:
+            logger (UILogger): 日志记录器实例。
+            stream_finder (StreamFinder): 直播源嗅探器实例。
+            event_queue (queue.Queue): 发布 SourceEvent 的事件队列，由控制器消费。
+        """
+        self.logger = logger
+        self.finder = stream_finder
+        self.event_queue = event_queue
+        self.thread = None
+        self._stop_event = None
+
+    def start(self, douyin_ids: list, scheduler, scan_workers: int = 1):
+        """启动后台扫描线程，每个ID何时检查由 scheduler (PollScheduler) 决定。"""
+        self.stop()
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(list(douyin_ids), scheduler, scan_workers, self._stop_event), daemon=True
+        )
+        self.thread.start()
+        self.logger.log("🛰️ [扫描器] 后台扫描已启动。")
+
+    def stop(self):
+        """通知后台扫描线程退出，不等待正在进行中的解析。"""
+        if self._stop_event and not self._stop_event.is_set():
+            self._stop_event.set()
+            self.logger.log("🛰️ [扫描器] 后台扫描已停止。")
+        self._stop_event = None
+        self.thread = None
+
+    def is_running(self) -> bool:
+        return self._stop_event is not None and not self._stop_event.is_set()
+
+    def _run(self, douyin_ids, scheduler, scan_workers, stop_event):
+        """扫描线程主循环：定时向调度器取出到期的ID，按优先级检查。"""
+        while not stop_event.wait(self.TICK_INTERVAL):
+            due_ids = scheduler.due_ids(douyin_ids)
+            if not due_ids: continue
+            douyin_id, url = self.finder.find_first_live(
+                due_ids, scan_workers, lambda: not stop_event.is_set(), lambda i, u: scheduler.record(i, bool(u))
+            )
+            if url and not stop_event.is_set():
+                self.logger.log(f"📣 [扫描器] 发现正在直播的源: {douyin_id}，已通知控制器。")
+                self.event_queue.put(SourceEvent(douyin_id, url))
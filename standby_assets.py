@@ -0,0 +1,120 @@
+# standby_assets.py
+import hashlib
+import os
+import subprocess
+import threading
+from standby_playlist import concat_input_args
+from process_tuning import ProcessTuning
+
+class StandbyAssetCache:
+    """
+    备用视频的预转码缓存：把备用视频一次性转码为符合YouTube推流要求的 H.264/AAC 文件
+    （固定关键帧间隔），保存在源文件旁边，之后待机推流可以直接用 `-c copy` 循环，几乎不占CPU。
+    转码时按输出规格（max_output_height / max_output_fps）缩放和降帧。
+    缓存文件名包含“源文件内容哈希 + 编码参数”的摘要，任何一方变化都会重新生成。
+    转码在后台线程中以单线程、最低优先级进行，不与实时推流争抢CPU；完成之前待机推流照常实时编码。
+    """
+
+    def __init__(self, logger, config_manager, media_probe, video_filters):
+        """
+        Args:
+            media_probe (MediaProbe): 用于读取源文件的分辨率和帧率。
+            video_filters (callable): (媒体信息, 画质档位) -> 滤镜列表，与实时推流使用同一套输出规格。
+        """
+        self.logger = logger
+        self.config = config_manager
+        self.media_probe = media_probe
+        self.video_filters = video_filters
+        self.tuning = ProcessTuning(logger, config_manager)
+        self._lock = threading.Lock()
+        self._ready = {}    # {(源文件路径, 大小, 修改时间, 编码参数): 预转码文件路径}
+        self._pending = set()
+
+    def _encode_settings(self) -> dict:
+        return {
+            'bitrate': self.config.get('FFmpeg', 'bitrate', '4000k'),
+            'audio_bitrate': self.config.get_section('FFmpeg').get('audio_bitrate', '128k'),
+            'keyframe_interval_sec': float(self.config.get_section('FFmpeg').get('keyframe_interval_sec', 2)),
+            'max_output_height': int(self.config.get_section('FFmpeg').get('max_output_height', 0)),
+            'max_output_fps': float(self.config.get_section('FFmpeg').get('max_output_fps', 0)),
+            'scaler': self.config.get_section('FFmpeg').get('scaler', 'bicubic'),
+        }
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def get_asset(self, source_path: str) -> str | None:
+        """
+        返回已准备好的预转码文件路径。尚未准备好时在后台开始准备，并返回None。
+
+        Args:
+            source_path (str): 原始备用视频路径。
+
+        Returns:
+            str | None: 可直接用 `-c copy` 推流的文件路径，或None（本次仍需实时编码）。
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        settings = self._encode_settings()
+        key = (os.path.abspath(source_path), stat.st_size, stat.st_mtime, repr(sorted(settings.items())))
+
+        with self._lock:
+            asset = self._ready.get(key)
+            if asset and os.path.exists(asset):
+                return asset
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+
+        threading.Thread(target=self._prepare, args=(key, source_path, settings), daemon=True).start()
+        return None
+
+    def _prepare(self, key, source_path, settings):
+        try:
+            digest = hashlib.sha1(f"{self._file_hash(source_path)}|{key[3]}".encode('utf-8')).hexdigest()[:12]
+            stem, _ = os.path.splitext(source_path)
+            asset = f"{stem}.yt-{digest}.mp4"
+            if not os.path.exists(asset) and not self._transcode(source_path, asset, settings):
+                return
+            with self._lock:
+                self._ready[key] = asset
+            self.logger.log(f"✅ [备用素材] 预转码的备用视频已就绪: {asset}，待机推流将使用直通模式。")
+        except Exception as e:
+            self.logger.log(f"❌ [备用素材] 准备预转码备用视频时发生错误: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _transcode(self, source_path: str, asset: str, settings: dict) -> bool:
+        ffmpeg_path = self.config.get('FFmpeg', 'ffmpeg_path', 'ffmpeg')
+        bitrate = settings['bitrate']
+        temp_path = f"{asset}.part.mp4"
+        filters = self.video_filters(self.media_probe.probe_file(source_path), None)
+        cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-filter_threads", "1", "-threads", "1", *concat_input_args(source_path), "-i", source_path,
+               "-map", "0:v:0", "-map", "0:a:0?", *(["-vf", ",".join(filters)] if filters else []),
+               "-c:v", "libx264", "-preset", "medium", "-threads", "1", "-pix_fmt", "yuv420p",
+               "-b:v", bitrate, "-maxrate", bitrate, "-bufsize", "8000k",
+               "-force_key_frames", f"expr:gte(t,n_forced*{settings['keyframe_interval_sec']})", "-sc_threshold", "0",
+               "-c:a", "aac", "-b:a", settings['audio_bitrate'], "-ar", "44100",
+               "-movflags", "+faststart", temp_path]
+
+        self.logger.log(f"🎞️ [备用素材] 正在后台预转码备用视频（只需一次）: {source_path}")
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='ignore', **self.tuning.popen_kwargs(background=True))
+            self.tuning.apply(process, background=True)
+            _, stderr = process.communicate()
+        except FileNotFoundError:
+            self.logger.log(f"❌ [备用素材] 找不到 FFmpeg 程序: '{ffmpeg_path}'"); return False
+        if process.returncode != 0:
+            self.logger.log(f"❌ [备用素材] 预转码失败，将继续实时编码备用视频。FFmpeg 错误: {stderr.strip()}")
+            if os.path.exists(temp_path): os.remove(temp_path)
+            return False
+        os.replace(temp_path, asset)
+        return True
@@ -0,0 +1,89 @@
+# standby_playlist.py
+import os
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.flv', '.ts', '.m4v', '.webm', '.avi')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
+# concat 分离器要求列表中所有文件的这些参数一致，否则推流中途会出错
+COMPATIBILITY_FIELDS = ('video_codec', 'width', 'height', 'pix_fmt', 'audio_codec', 'sample_rate', 'channels')
+
+def concat_input_args(stream_input: str) -> list:
+    """播放列表文件需要通过 concat 分离器读取，返回需要放在 -i 之前的参数。"""
+    return ["-f", "concat", "-safe", "0"] if stream_input.lower().endswith('.ffconcat') else []
+
+def is_still_image(stream_input: str) -> bool:
+    """备用素材是否为一张静态图片（静态图片待机模式）。"""
+    return stream_input.lower().endswith(IMAGE_EXTENSIONS)
+
+class StandbyPlaylist:
+    """
+    备用视频播放列表：把一个目录或一组文件生成为 FFmpeg concat 列表，
+    由同一个FFmpeg进程按顺序循环播放，切换文件时不需要重启进程。
+    每个文件都会先用 ffprobe 检查（结果有缓存），不兼容的文件在生成列表时就被剔除。
+    """
+
+    def __init__(self, logger, media_probe, list_path='standby_playlist.ffconcat'):
+        self.logger = logger
+        self.media_probe = media_probe
+        self.list_path = list_path
+
+    @staticmethod
+    def _collect_items(spec: str | list) -> list:
+        """把配置项（目录，或用逗号分隔的文件列表）展开为文件路径列表。"""
+        if isinstance(spec, str):
+            if os.path.isdir(spec.strip()):
+                directory = spec.strip()
+                return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                        if name.lower().endswith(VIDEO_EXTENSIONS) and '.yt-' not in name]
+            spec = spec.split(',')
+        return [str(item).strip() for item in spec if str(item).strip()]
+
+    def build(self, spec: str | list) -> str | None:
+        """
+        检查播放列表中的每个文件，并生成 concat 列表文件。
+
+        Args:
+            spec (str | list): 目录路径，或文件路径列表。
+
+        Returns:
+            str | None: 生成的列表文件路径；没有任何可用文件时返回None。
+        """
+        accepted, reference = [], None
+        for path in self._collect_items(spec):
+            info = self.media_probe.probe_file(path)
+            if not info or not info.get('video_codec'):
+                self.logger.log(f"⚠️ [播放列表] 跳过无法识别的文件: {path}"); continue
+            if info.get('duration', 0) <= 0:
+                self.logger.log(f"⚠️ [播放列表] 跳过时长未知的文件: {path}"); continue
+            if reference is None:
+                reference = info
+            mismatched = [field for field in COMPATIBILITY_FIELDS if info.get(field) != reference.get(field)]
+            if mismatched:
+                details = ', '.join(f"{field}={info.get(field)} (应为 {reference.get(field)})" for field in mismatched)
+                self.logger.log(f"⚠️ [播放列表] 跳过与第一个文件参数不一致的文件: {path}，{details}"); continue
+            accepted.append((path, info))
+
+        if not accepted:
+            self.logger.log("❌ [播放列表] 播放列表中没有可用的视频文件。")
+            return None
+
+        lines = ["ffconcat version 1.0"]
+        for path, info in accepted:
+            stat = os.stat(path)
+            # 注释行记录文件大小和修改时间，文件变化时列表内容随之变化（供预转码缓存判断）
+            lines.append(f"# {stat.st_size} {stat.st_mtime}")
+            escaped = os.path.abspath(path).replace('\\', '/').replace("'", "'\\''")
+            lines.append(f"file '{escaped}'")
+            lines.append(f"duration {info['duration']:.3f}")
+
+        content = '\n'.join(lines) + '\n'
+        # 内容不变时不重写文件，保持修改时间不变，避免预转码缓存误判为新文件
+        previous = None
+        if os.path.exists(self.list_path):
+            with open(self.list_path, 'r', encoding='utf-8') as f:
+                previous = f.read()
+        if previous != content:
+            with open(self.list_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        self.logger.log(f"✅ [播放列表] 备用播放列表已生成，共 {len(accepted)} 个文件: {self.list_path}")
+        return self.list_path
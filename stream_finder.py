@@ -1,27 +1,57 @@
 # stream_finder.py (v2 - Streamlink Edition)
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import streamlink
 from streamlink.exceptions import PluginError, NoStreamsError
+from room_probe import DouyinRoomProbe
 
 class StreamFinder:
     """负责从指定平台抓取直播源的URL (使用Streamlink核心)。"""
 
-    def __init__(self, logger, config_manager):
+    def __init__(self, logger, config_manager, room_probe=None):
         """
         初始化 StreamFinder。
+
+        Args:
+            room_probe (DouyinRoomProbe | None): 第一层房间状态探测器，默认使用真实的抖音接口。
         """
         self.logger = logger
         self.config = config_manager
         # Streamlink需要一个会话来管理插件和设置
         self.session = streamlink.Streamlink()
         # 设置必要的HTTP头，模拟浏览器访问，这是反屏蔽的关键
-        self.session.set_option("http-headers", {
+        self.http_headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
             "Referer": "https://live.douyin.com/"
-        })
+        }
+        self.session.set_option("http-headers", self.http_headers)
+        self.room_probe = room_probe or DouyinRoomProbe(logger, config_manager)
+
+        # 已解析地址的缓存: {douyin_id: (stream_url, resolved_at)}，只缓存成功解析到的地址
+        self._url_cache = {}
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_ttl(self) -> float:
+        return float(self.config.get_section('Douyin').get('url_cache_ttl', 300))
+
+    def invalidate(self, douyin_id: str):
+        """使某个抖音ID的缓存地址失效（例如该地址推流失败时）。"""
+        with self._cache_lock:
+            if self._url_cache.pop(douyin_id, None):
+                self.logger.log(f"🧹 [嗅探器] [{douyin_id}] 缓存的直播流地址已失效，下次将重新解析。")
+
+    def cache_stats(self) -> dict:
+        """返回地址缓存的命中/未命中计数。"""
+        with self._cache_lock:
+            return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._url_cache)}
 
     def get_douyin_stream_url(self, douyin_id: str) -> str | None:
         """
-        使用Streamlink获取指定抖音ID的直播流地址。
+        获取指定抖音ID的直播流地址。在 url_cache_ttl 秒内解析过的地址直接从缓存返回，
+        否则使用Streamlink重新解析。
 
         Args:
             douyin_id (str): 抖音用户ID。
@@ -29,6 +59,32 @@ class StreamFinder:
         Returns:
             str | None: 如果找到，返回流地址；否则返回None。
         """
+        ttl = self._cache_ttl()
+        with self._cache_lock:
+            cached = self._url_cache.get(douyin_id)
+            if cached and time.time() - cached[1] < ttl:
+                self.cache_hits += 1
+                self.logger.log(f"⚡ [嗅探器] [{douyin_id}] 使用 {time.time() - cached[1]:.0f} 秒前缓存的直播流地址。")
+                return cached[0]
+            self.cache_misses += 1
+
+        stream_url = self._resolve_douyin_stream_url(douyin_id)
+        with self._cache_lock:
+            if stream_url and ttl > 0:
+                self._url_cache[douyin_id] = (stream_url, time.time())
+            else:
+                self._url_cache.pop(douyin_id, None)
+        return stream_url
+
+    def _room_probe_enabled(self) -> bool:
+        return str(self.config.get_section('Douyin').get('room_probe', 'false')).lower() == 'true'
+
+    def _resolve_douyin_stream_url(self, douyin_id: str) -> str | None:
+        """先用轻量的房间状态请求判断是否开播，只有可能开播时才使用Streamlink完整解析。"""
+        if self._room_probe_enabled() and self.room_probe.is_live(douyin_id, self.http_headers) is False:
+            self.logger.log(f"💤 [嗅探器] [{douyin_id}] 房间状态显示未开播，跳过完整解析。")
+            return None
+
         url = f"https://live.douyin.com/{douyin_id}"
         self.logger.log(f"🕵️ [嗅探器] 正在使用 Streamlink 解析: {url}")
 
@@ -37,16 +93,16 @@ class StreamFinder:
             streams = self.session.streams(url)
             
             if not streams:
-                self.logger.log("⚠️ [嗅探器] 未找到任何直播流，主播可能未开播。")
+                self.logger.log(f"⚠️ [嗅探器] [{douyin_id}] 未找到任何直播流，主播可能未开播。")
                 return None
 
             # 我们通常选择最高画质的流 'best'
             stream = streams["best"]
-            self.logger.log("✅ [嗅探器] 成功获取到直播流地址！")
+            self.logger.log(f"✅ [嗅探器] [{douyin_id}] 成功获取到直播流地址！")
             return stream.url
 
         except NoStreamsError:
-            self.logger.log("⚠️ [嗅探器] 未找到任何直播流 (NoStreamsError)，主播确定未开播。")
+            self.logger.log(f"⚠️ [嗅探器] [{douyin_id}] 未找到任何直播流 (NoStreamsError)，主播确定未开播。")
             return None
         except PluginError as e:
             # PluginError通常意味着平台更新了反爬机制，或者URL格式错误
@@ -55,3 +111,50 @@ class StreamFinder:
         except Exception as e:
             self.logger.log(f"❌ [嗅探器] 解析时发生未知错误: {e}")
             return None
+
+    def find_first_live(self, douyin_ids: list, max_workers: int = 1, should_continue=None, on_result=None) -> tuple[str | None, str | None]:
+        """
+        按优先级扫描抖音ID列表，返回优先级最高的正在直播的源。
+
+        max_workers 大于1时并发解析：只有当所有更高优先级的ID都已检查完毕，
+        才会采用某个正在直播的源；一旦确定结果，尚未开始的解析任务会被取消。
+
+        Args:
+            douyin_ids (list): 按优先级排列的抖音ID列表。
+            max_workers (int): 并发解析的线程数，小于等于1时逐个串行扫描。
+            should_continue (callable | None): 返回False时立即放弃本轮扫描。
+            on_result (callable | None): 每得到一个ID的检查结果时调用 on_result(douyin_id, stream_url)。
+
+        Returns:
+            tuple[str | None, str | None]: (douyin_id, stream_url)，未找到时均为None。
+        """
+        if max_workers <= 1 or len(douyin_ids) <= 1:
+            for douyin_id in douyin_ids:
+                if should_continue and not should_continue(): break
+                url = self.get_douyin_stream_url(douyin_id)
+                if on_result: on_result(douyin_id, url)
+                if url:
+                    return douyin_id, url
+            return None, None
+
+        workers = min(max_workers, len(douyin_ids))
+        self.logger.log(f"🕵️ [嗅探器] 正在使用 {workers} 个线程并发扫描 {len(douyin_ids)} 个直播源...")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="douyin-scan")
+        futures = [executor.submit(self.get_douyin_stream_url, douyin_id) for douyin_id in douyin_ids]
+        try:
+            # 按优先级顺序等待结果，保证高优先级的源总是先被采用
+            for douyin_id, future in zip(douyin_ids, futures):
+                while True:
+                    if should_continue and not should_continue(): return None, None
+                    try:
+                        url = future.result(timeout=0.5)
+                        break
+                    except FutureTimeoutError:
+                        continue
+                if on_result: on_result(douyin_id, url)
+                if url:
+                    return douyin_id, url
+            return None, None
+        finally:
+            # 不等待仍在进行中的解析，尚未开始的任务直接取消
+            executor.shutdown(wait=False, cancel_futures=True)
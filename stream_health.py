@@ -0,0 +1,137 @@
+# stream_health.py
+import threading
+import time
+
+class HealthEvent:
+    """健康检查器发布给控制器的事件：YouTube 报告的推流健康状况发生了变化，或需要控制器处理。"""
+    def __init__(self, health: str, stream_status: str, issues: list, action: str | None = None):
+        self.health = health
+        self.stream_status = stream_status
+        self.issues = issues
+        self.action = action # None（仅通知）、'step_down'（降低画质）或 'restart'（重启推流）
+        self.created_at = time.time()
+
+    def describe(self) -> str:
+        issues = ', '.join(f"{issue.get('type')}({issue.get('severity')})" for issue in self.issues)
+        return f"健康状况 {self.health}，接收状态 {self.stream_status}" + (f"，问题: {issues}" if issues else "")
+
+class StreamHealthMonitor:
+    """
+    后台轮询绑定的直播流在 YouTube 一侧的健康状况 (liveStreams.list part=status)，
+    在观众看到画面出问题之前，通过事件队列通知控制器降低画质或重启推流。
+    轮询间隔是自适应的：切换推流后或状况不佳时频繁检查，稳定后逐步放慢，节省API配额。
+    """
+
+    # 这个问题说明推流跟不上实时（编码太慢或上行带宽不足），降低画质通常可以解决
+    STEP_DOWN_ISSUES = ('videoIngestionStarved',)
+    # 只有 YouTube 收不到数据时才重启推流；其他配置问题（码率偏高、关键帧间隔等）重启也解决不了，只记录日志
+    NO_DATA_HEALTH = ('noData',)
+    NO_DATA_STATUS = ('inactive', 'error')
+    HEALTHY = ('good', 'ok')
+
+    def __init__(self, logger, config_manager, youtube_manager, event_queue):
+        """
+        初始化 StreamHealthMonitor。
+
+        Args:
+            logger (UILogger): 日志记录器实例。
+            config_manager (ConfigManager): 配置管理器实例。
+            youtube_manager (YouTubeManager): 用于查询直播流状态。
+            event_queue (queue.Queue): 发布 HealthEvent 的事件队列，由控制器消费。
+        """
+        self.logger = logger
+        self.config = config_manager
+        self.youtube = youtube_manager
+        self.event_queue = event_queue
+        self.thread = None
+        self._stop_event = None
+        self._wake = threading.Event()
+        self._switched_at = time.time()
+
+    def enabled(self) -> bool:
+        return str(self.config.get_section('YouTube').get('health_check', 'false')).lower() == 'true'
+
+    def _setting(self, key: str, default: float) -> float:
+        return float(self.config.get_section('YouTube').get(key, default))
+
+    def start(self, stream_id: str):
+        """启动后台健康检查线程（未启用 health_check 时不做任何事）。"""
+        self.stop()
+        if not self.enabled() or not stream_id:
+            return
+        self._stop_event = threading.Event()
+        self._switched_at = time.time()
+        self.thread = threading.Thread(target=self._run, args=(stream_id, self._stop_event), daemon=True)
+        self.thread.start()
+        self.logger.log("🩺 [健康检查] 已启动YouTube推流健康检查。")
+
+    def stop(self):
+        if self._stop_event:
+            self._stop_event.set()
+            self._wake.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+        self.thread = None
+        self._stop_event = None
+
+    def notify_switch(self):
+        """每次切换或重启推流后调用：立即恢复频繁检查，并在宽限期内不触发处理。"""
+        self._switched_at = time.time()
+        self._wake.set()
+
+    def _run(self, stream_id: str, stop_event: threading.Event):
+        min_interval = self._setting('health_poll_min', 15)
+        max_interval = self._setting('health_poll_max', 300)
+        fast_window = self._setting('health_fast_window', 120)
+        bad_polls_needed = int(self._setting('health_bad_polls', 2))
+        max_restarts = int(self._setting('health_max_restarts', 3))
+        interval, bad_polls, last_signature = min_interval, 0, None
+        restarts = 0 # 连续处理的次数，状况恢复正常后清零
+
+        # 切换推流后先等一个短间隔，YouTube 需要几秒钟才会更新接收状态
+        self._wake.clear()
+        self._wake.wait(min_interval)
+        while not stop_event.is_set():
+            self._wake.clear()
+            health = self.youtube.get_stream_health(stream_id)
+            if health:
+                healthy = health['health'] in self.HEALTHY and not any(issue.get('severity') == 'error' for issue in health['issues'])
+                if healthy:
+                    bad_polls, restarts = 0, 0
+                else:
+                    bad_polls += 1
+                # 退避：每连续处理一次，触发下一次处理所需的连续不佳次数加倍
+                action = self._action(health, bad_polls, bad_polls_needed * 2 ** restarts)
+                if action and max_restarts > 0 and restarts >= max_restarts:
+                    if bad_polls == bad_polls_needed * 2 ** restarts:
+                        self.logger.log(f"⚠️ [健康检查] 已连续处理 {restarts} 次仍未恢复，在状况恢复正常之前不再重启推流。")
+                    action = None
+                if action:
+                    bad_polls = 0 # 处理之后重新累计，避免同一个问题连续触发
+                    restarts += 1
+                signature = (health['health'], health['stream_status'], tuple(sorted(issue.get('type', '') for issue in health['issues'])))
+                if action or signature != last_signature:
+                    self.event_queue.put(HealthEvent(health['health'], health['stream_status'], health['issues'], action))
+                last_signature = signature
+
+                # 自适应间隔：切换后的一段时间内或状况不佳时频繁检查，稳定后每次加倍，直到上限
+                if not healthy or time.time() - self._switched_at < fast_window:
+                    interval = min_interval
+                else:
+                    interval = min(max_interval, interval * 2)
+            self._wake.wait(interval)
+
+    def _action(self, health: dict, bad_polls: int, bad_polls_needed: int) -> str | None:
+        """
+        状况持续不佳（连续 bad_polls_needed 次）且不在切换后的宽限期内时，决定如何处理：
+        推流跟不上实时则降档（无法降档时由控制器重启），YouTube 收不到数据则重启，其他问题只通知。
+        """
+        if bad_polls < bad_polls_needed:
+            return None
+        if time.time() - self._switched_at < self._setting('health_switch_grace', 30):
+            return None
+        if any(issue.get('type') in self.STEP_DOWN_ISSUES for issue in health['issues']):
+            return 'step_down'
+        if health['health'] in self.NO_DATA_HEALTH or health['stream_status'] in self.NO_DATA_STATUS:
+            return 'restart'
+        return None
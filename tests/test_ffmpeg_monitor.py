@@ -0,0 +1,55 @@
+# tests/test_ffmpeg_monitor.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ffmpeg_monitor import FFmpegMonitor
+
+class FakeProcess:
+    """模拟 FFmpeg 子进程：stdout 按顺序输出给定的 -progress 文本，进程一直处于运行状态。"""
+    def __init__(self, progress_lines):
+        self.stdout = iter(progress_lines)
+        self.stderr = None
+
+    def poll(self):
+        return None
+
+def progress_block(frame, out_time_us, total_size):
+    return [f"frame={frame}\n", "fps=30.0\n", f"total_size={total_size}\n",
+            f"out_time_us={out_time_us}\n", "speed=1.0x\n", "progress=continue\n"]
+
+class FFmpegMonitorReadinessTest(unittest.TestCase):
+    def test_ready_when_output_size_grows(self):
+        lines = progress_block(10, 300000, 1000) + progress_block(20, 600000, 2000)
+        self.assertEqual(FFmpegMonitor(FakeProcess(lines)).wait_until_ready(2), 'ready')
+
+    def test_tee_output_without_size_becomes_ready(self):
+        # tee 分发时 FFmpeg 报告 total_size=N/A，只能依据输出时间戳判断
+        lines = progress_block(10, 300000, 'N/A') + progress_block(20, 600000, 'N/A')
+        self.assertEqual(FFmpegMonitor(FakeProcess(lines)).wait_until_ready(2), 'ready')
+
+    def test_not_ready_without_progress(self):
+        lines = progress_block(0, 0, 'N/A') + progress_block(0, 0, 'N/A')
+        self.assertEqual(FFmpegMonitor(FakeProcess(lines)).wait_until_ready(0.5), 'timeout')
+
+class FFmpegMonitorSpeedTest(unittest.TestCase):
+    def test_recent_speed_recovers_after_short_stall(self):
+        monitor = FFmpegMonitor(FakeProcess([]))
+        out_time = 0.0
+        for second in range(0, 30):         # 正常推流 30 秒
+            monitor._recent_speed(second, out_time); out_time += 1
+        for second in range(30, 40):        # 直播源卡住 10 秒
+            monitor._recent_speed(second, out_time)
+        for second in range(40, 55):        # 恢复正常
+            speed = monitor._recent_speed(second, out_time); out_time += 1
+        # 累计平均速度此时约为 0.8x，而最近窗口内的速度已经恢复到实时
+        self.assertAlmostEqual(speed, 1.0, places=1)
+
+    def test_recent_speed_unknown_at_start(self):
+        monitor = FFmpegMonitor(FakeProcess([]))
+        self.assertEqual(monitor._recent_speed(100.0, 0.0), 0.0)
+        self.assertEqual(monitor._recent_speed(100.5, 0.5), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
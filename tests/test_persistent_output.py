@@ -0,0 +1,123 @@
+# tests/test_persistent_output.py
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ffmpeg_manager
+import output_muxer
+from ffmpeg_manager import FFmpegManager
+
+YOUTUBE_URL = "rtmp://127.0.0.1:1935/live/test"
+LIVE_URL = "https://example.com/live/stream.flv"
+
+class FakeConfig:
+    def __init__(self, **ffmpeg):
+        self.sections = {'FFmpeg': {
+            'ffmpeg_path': 'ffmpeg', 'encoder_preference': 'copy,cpu', 'bitrate': '4000k', 'auto_copy': 'true',
+            'persistent_output': 'true', 'max_output_height': 720, 'max_output_fps': 30, 'relay_port': 23000,
+            'adaptive_quality': 'false', 'standby_precompute': 'true', **ffmpeg,
+        }}
+
+    def get(self, section, key, default=None):
+        return self.sections.get(section, {}).get(key, default)
+
+    def get_section(self, section):
+        return self.sections.get(section, {})
+
+class FakeLogger:
+    def log(self, message):
+        pass
+
+class FakeProcess:
+    pid = 4242
+
+    def __init__(self, cmd, **kwargs):
+        self.cmd = cmd
+
+    def poll(self):
+        return None
+
+class FakeMonitor:
+    def __init__(self, process, *args):
+        self.process = process
+
+    def wait_until_ready(self, timeout):
+        return 'ready'
+
+def option(cmd, name):
+    """返回命令中某个选项的值（最后一次出现）。"""
+    return cmd[len(cmd) - 1 - cmd[::-1].index(name) + 1]
+
+class PersistentOutputCommandTest(unittest.TestCase):
+    """常驻输出模式下，检查生成的输入进程和常驻输出进程命令（不实际启动FFmpeg）。"""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.commands = []
+        def popen(cmd, **kwargs):
+            self.commands.append(cmd)
+            return FakeProcess(cmd)
+        for patcher in (mock.patch.object(ffmpeg_manager.subprocess, 'Popen', popen),
+                        mock.patch.object(output_muxer.subprocess, 'Popen', popen),
+                        mock.patch.object(ffmpeg_manager, 'FFmpegMonitor', FakeMonitor),
+                        mock.patch.object(output_muxer, 'FFmpegMonitor', FakeMonitor),
+                        mock.patch.object(output_muxer.time, 'sleep', lambda seconds: None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = FFmpegManager(FakeLogger(), FakeConfig())
+        self.manager.encoder_probe.is_available = lambda encoder, path: True
+        self.manager.encoder_probe.supports_option = lambda option, path: True
+        # 一个本可以直通的 1080p60 H.264/AAC 48kHz 直播源
+        self.manager.media_probe.probe = lambda target: {
+            'video_codec': 'h264', 'profile': 'High', 'pix_fmt': 'yuv420p', 'width': 1920, 'height': 1080,
+            'fps': 60.0, 'audio_codec': 'aac', 'sample_rate': 48000,
+        }
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_muxer_relays_to_youtube_with_stream_copy(self):
+        self.manager.start_stream(LIVE_URL, YOUTUBE_URL)
+        muxer_cmd = self.commands[0]
+        self.assertIn("udp://127.0.0.1:23000?fifo_size=1000000&overrun_nonfatal=1", muxer_cmd)
+        self.assertEqual(option(muxer_cmd, "-c"), "copy")
+        self.assertEqual(muxer_cmd[-3:], ["-f", "flv", YOUTUBE_URL])
+
+    def test_live_and_standby_stages_share_one_profile(self):
+        self.manager.start_stream(LIVE_URL, YOUTUBE_URL)
+        self.manager.start_stream("standby.mp4", YOUTUBE_URL, is_standby=True)
+        live_cmd, standby_cmd = self.commands[1], self.commands[2]
+
+        for cmd in (live_cmd, standby_cmd):
+            self.assertNotIn("copy", cmd) # 不直通
+            self.assertEqual(option(cmd, "-c:v"), "libx264")
+            self.assertEqual((option(cmd, "-ar"), option(cmd, "-ac")), ("44100", "2"))
+            self.assertEqual(cmd[-3:], ["-f", "mpegts", "udp://127.0.0.1:23000?pkt_size=1316"])
+        self.assertEqual(option(live_cmd, "-vf"), option(standby_cmd, "-vf"))
+        self.assertIn("scale=1280:720", option(live_cmd, "-vf"))
+        self.assertIn("fps=30", option(live_cmd, "-vf"))
+        self.assertEqual(option(live_cmd, "-g"), option(standby_cmd, "-g"))
+
+    def test_still_image_stage_uses_the_same_profile(self):
+        self.manager.start_stream(LIVE_URL, YOUTUBE_URL)
+        self.manager.start_stream("standby.png", YOUTUBE_URL, is_standby=True)
+        live_cmd, still_cmd = self.commands[1], self.commands[2]
+        self.assertEqual(option(live_cmd, "-vf"), option(still_cmd, "-vf"))
+        self.assertEqual((option(still_cmd, "-ar"), option(still_cmd, "-ac")), ("44100", "2"))
+
+    def test_copy_still_chosen_without_persistent_output(self):
+        manager = FFmpegManager(FakeLogger(), FakeConfig(persistent_output='false', max_output_height=0, max_output_fps=0))
+        manager.encoder_probe.is_available = lambda encoder, path: True
+        manager.encoder_probe.supports_option = lambda option, path: True
+        manager.media_probe.probe = self.manager.media_probe.probe
+        manager.start_stream(LIVE_URL, YOUTUBE_URL)
+        self.assertEqual(option(self.commands[0], "-c:v"), "copy")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_quality_ladder.py
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import quality_ladder
+from quality_ladder import QualityLadder
+
+class FakeConfig:
+    def __init__(self, **ffmpeg):
+        self.ffmpeg = {'adaptive_quality': 'true', 'cpu_preset': 'veryfast', 'bitrate': '4000k',
+                       'quality_step_down_after': 20, 'quality_step_up_after': 600, **ffmpeg}
+
+    def get_section(self, section):
+        return self.ffmpeg if section == 'FFmpeg' else {}
+
+class FakeLogger:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, message):
+        self.lines.append(message)
+
+class FakeStats:
+    def __init__(self, recent_speed):
+        self.recent_speed = recent_speed
+        self.drop_frames = 0
+        self.updated_at = 1
+
+class QualityLadderTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(quality_ladder.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_for(self, ladder, seconds, speed):
+        """每秒评估一次，返回这段时间内的换档次数。"""
+        changes = 0
+        for _ in range(int(seconds)):
+            self.now += 1
+            if ladder.evaluate(FakeStats(speed)):
+                changes += 1
+        return changes
+
+    def test_default_ladder_never_uses_a_slower_preset(self):
+        presets = [rung['preset'] for rung in QualityLadder(FakeLogger(), FakeConfig()).rungs()]
+        order = [quality_ladder.X264_PRESETS.index(preset) for preset in presets]
+        self.assertEqual(order, sorted(order, reverse=True))
+
+    def test_slower_preset_is_replaced_with_warning(self):
+        logger = FakeLogger()
+        ladder = QualityLadder(logger, FakeConfig(quality_ladder='faster:3000k:720,ultrafast:1200k:480'))
+        self.assertEqual([rung['preset'] for rung in ladder.rungs()], ['veryfast', 'veryfast', 'ultrafast'])
+        ladder.rungs()
+        self.assertEqual(len(logger.lines), 1) # 同一个问题只警告一次
+
+    def test_step_up_backs_off_after_failed_step_up(self):
+        ladder = QualityLadder(FakeLogger(), FakeConfig())
+        ladder.on_stream_started()
+        self.assertEqual(self.run_for(ladder, 25, 0.8), 1)    # 速度不足，降到第2档
+        self.assertEqual(self.run_for(ladder, 600, 1.0), 1)   # 稳定 600 秒后升回第1档
+        self.assertEqual(self.run_for(ladder, 25, 0.8), 1)    # 刚升上来就撑不住，再次降档
+        self.assertEqual(self.run_for(ladder, 1100, 1.0), 0)  # 升档等待时间加倍为 1200 秒
+        self.assertEqual(self.run_for(ladder, 110, 1.0), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# tests/test_room_probe.py
+import json
+import os
+import sys
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from room_probe import DouyinRoomProbe
+
+class FakeDouyinHandler(BaseHTTPRequestHandler):
+    """代替抖音房间接口的本地HTTP服务：web_rid 决定返回的内容。"""
+    RESPONSES = {
+        'live': (200, json.dumps({'data': {'data': [{'status': 2}]}})),
+        'offline': (200, json.dumps({'data': {'data': [{'status': 4}]}})),
+        'error': (503, 'Service Unavailable'),
+        'malformed': (200, '<html>验证码</html>'),
+        'no_rooms': (200, json.dumps({'data': {'data': []}})),
+    }
+
+    def do_GET(self):
+        web_rid = parse_qs(urlparse(self.path).query).get('web_rid', [''])[0]
+        status, body = self.RESPONSES.get(web_rid, (404, ''))
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+def urllib_transport(url, headers, timeout):
+    """用标准库发送请求的传输层，测试时不依赖 requests。"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8')
+
+class FakeConfig:
+    def __init__(self, **douyin):
+        self.douyin = douyin
+
+    def get_section(self, section):
+        return self.douyin if section == 'Douyin' else {}
+
+class FakeLogger:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, message):
+        self.lines.append(message)
+
+class DouyinRoomProbeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), FakeDouyinHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/room?web_rid={{douyin_id}}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.logger = FakeLogger()
+        self.probe = DouyinRoomProbe(self.logger, FakeConfig(room_probe_url=self.url, room_probe_timeout=2), transport=urllib_transport)
+
+    def test_live_room(self):
+        self.assertIs(self.probe.is_live('live'), True)
+
+    def test_offline_room(self):
+        self.assertIs(self.probe.is_live('offline'), False)
+
+    def test_non_200_is_undetermined(self):
+        self.assertIsNone(self.probe.is_live('error'))
+
+    def test_malformed_response_is_undetermined(self):
+        self.assertIsNone(self.probe.is_live('malformed'))
+        self.assertIsNone(self.probe.is_live('no_rooms'))
+
+    def test_transport_error_is_undetermined(self):
+        def broken(url, headers, timeout):
+            raise OSError("connection refused")
+        probe = DouyinRoomProbe(self.logger, FakeConfig(room_probe_url=self.url), transport=broken)
+        self.assertIsNone(probe.is_live('live'))
+
+    def test_warns_once_when_never_determined(self):
+        for _ in range(DouyinRoomProbe.UNKNOWN_WARN_AFTER + 5):
+            self.probe.is_live('malformed')
+        self.assertEqual(sum('room_probe = false' in line for line in self.logger.lines), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# tests/test_stream_finder.py
+import importlib.util
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HAVE_STREAMLINK = importlib.util.find_spec('streamlink') is not None
+
+class FakeConfig:
+    def __init__(self, **douyin):
+        self.douyin = douyin
+
+    def get_section(self, section):
+        return self.douyin if section == 'Douyin' else {}
+
+class FakeLogger:
+    def log(self, message):
+        pass
+
+class FakeRoomProbe:
+    def __init__(self, results):
+        self.results = results
+
+    def is_live(self, douyin_id, headers=None):
+        return self.results[douyin_id]
+
+class FakeStream:
+    def __init__(self, url):
+        self.url = url
+
+@unittest.skipUnless(HAVE_STREAMLINK, "未安装 streamlink")
+class TwoTierResolutionTest(unittest.TestCase):
+    def setUp(self):
+        from stream_finder import StreamFinder
+        probe = FakeRoomProbe({'offline': False, 'live': True, 'unknown': None})
+        self.finder = StreamFinder(FakeLogger(), FakeConfig(room_probe='true', url_cache_ttl=0), room_probe=probe)
+        self.resolved = []
+        def streams(url):
+            self.resolved.append(url.rsplit('/', 1)[-1])
+            return {'best': FakeStream(f"https://cdn.example.com/{url.rsplit('/', 1)[-1]}.flv")}
+        self.finder.session.streams = streams
+
+    def test_offline_room_skips_full_resolution(self):
+        self.assertIsNone(self.finder.get_douyin_stream_url('offline'))
+        self.assertEqual(self.resolved, [])
+
+    def test_live_or_undetermined_room_is_fully_resolved(self):
+        self.assertTrue(self.finder.get_douyin_stream_url('live'))
+        self.assertTrue(self.finder.get_douyin_stream_url('unknown'))
+        self.assertEqual(self.resolved, ['live', 'unknown'])
+
+    def test_probe_ignored_when_disabled(self):
+        self.finder.config = FakeConfig(room_probe='false', url_cache_ttl=0)
+        self.assertTrue(self.finder.get_douyin_stream_url('offline'))
+        self.assertEqual(self.resolved, ['offline'])
+
+@unittest.skipUnless(HAVE_STREAMLINK, "未安装 streamlink")
+class PriorityScanTest(unittest.TestCase):
+    """并发扫描时按优先级采用结果：低优先级的开播结果必须等所有更高优先级的ID检查完毕。"""
+
+    def setUp(self):
+        from stream_finder import StreamFinder
+        self.finder = StreamFinder(FakeLogger(), FakeConfig(room_probe='false', url_cache_ttl=0), room_probe=FakeRoomProbe({}))
+        self.started = []
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def stub(self, plan):
+        """plan: {douyin_id: (延迟秒数或 'block', 是否开播)}"""
+        def resolve(douyin_id):
+            self.started.append(douyin_id)
+            delay, live = plan[douyin_id]
+            if delay == 'block':
+                self.release.wait(5)
+            else:
+                time.sleep(delay)
+            return f"https://cdn.example.com/{douyin_id}.flv" if live else None
+        self.finder._resolve_douyin_stream_url = resolve
+
+    def test_slow_offline_first_then_fast_live(self):
+        self.stub({'A': (0.3, False), 'B': (0.0, True), 'C': (0.0, True)})
+        self.assertEqual(self.finder.find_first_live(['A', 'B', 'C'], max_workers=3)[0], 'B')
+
+    def test_lower_priority_live_waits_for_higher_priority(self):
+        # C 最先返回开播，但 B 的优先级更高，也开播了，必须等 B
+        self.stub({'A': (0.3, False), 'B': (0.2, True), 'C': (0.0, True)})
+        self.assertEqual(self.finder.find_first_live(['A', 'B', 'C'], max_workers=3)[0], 'B')
+
+    def test_higher_priority_live_wins_even_if_slower(self):
+        self.stub({'A': (0.3, True), 'B': (0.0, True)})
+        self.assertEqual(self.finder.find_first_live(['A', 'B'], max_workers=2)[0], 'A')
+
+    def test_nothing_live(self):
+        self.stub({'A': (0.1, False), 'B': (0.0, False)})
+        self.assertEqual(self.finder.find_first_live(['A', 'B'], max_workers=2), (None, None))
+
+    def test_unstarted_lookups_are_cancelled(self):
+        self.stub({'A': (0.1, True), 'B': ('block', False), 'C': ('block', False), 'D': (0.0, False)})
+        self.assertEqual(self.finder.find_first_live(['A', 'B', 'C', 'D'], max_workers=2)[0], 'A')
+        self.release.set()
+        time.sleep(0.2)
+        self.assertNotIn('D', self.started)
+
+if __name__ == '__main__':
+    unittest.main()
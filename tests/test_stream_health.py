@@ -0,0 +1,74 @@
+# tests/test_stream_health.py
+import os
+import queue
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stream_health import StreamHealthMonitor
+
+class FakeConfig:
+    def __init__(self, **youtube):
+        self.youtube = youtube
+
+    def get_section(self, section):
+        return self.youtube if section == 'YouTube' else {}
+
+class FakeLogger:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, message):
+        self.lines.append(message)
+
+class FakeYouTube:
+    """按顺序返回给定的健康状况，返回完之后停止健康检查线程。"""
+    def __init__(self, results, stop_event):
+        self.results = list(results)
+        self.stop_event = stop_event
+
+    def get_stream_health(self, stream_id):
+        if len(self.results) == 1:
+            self.stop_event.set()
+        return self.results.pop(0)
+
+def health(status='good', stream_status='active', issues=()):
+    return {'health': status, 'stream_status': stream_status, 'issues': [{'type': t, 'severity': 'error'} for t in issues]}
+
+class StreamHealthActionTest(unittest.TestCase):
+    def setUp(self):
+        self.monitor = StreamHealthMonitor(FakeLogger(), FakeConfig(health_switch_grace=0), None, queue.Queue())
+
+    def test_no_data_restarts(self):
+        self.assertEqual(self.monitor._action(health('noData', 'inactive'), 2, 2), 'restart')
+
+    def test_ingestion_starved_steps_down(self):
+        self.assertEqual(self.monitor._action(health('bad', issues=['videoIngestionStarved']), 2, 2), 'step_down')
+
+    def test_other_issues_only_notify(self):
+        self.assertIsNone(self.monitor._action(health('bad', issues=['bitrateHigh', 'gopSizeLong']), 5, 2))
+
+class StreamHealthRestartCapTest(unittest.TestCase):
+    def run_monitor(self, results, **settings):
+        config = FakeConfig(health_poll_min=0.001, health_poll_max=0.001, health_switch_grace=0, **settings)
+        events, stop_event = queue.Queue(), threading.Event()
+        monitor = StreamHealthMonitor(FakeLogger(), config, FakeYouTube(results, stop_event), events)
+        monitor._run('stream-0001', stop_event)
+        actions = []
+        while not events.empty():
+            actions.append(events.get().action)
+        return [action for action in actions if action]
+
+    def test_restarts_back_off_and_stop_at_cap(self):
+        # 需要的连续不佳次数：1、2（退避加倍），之后达到上限不再重启
+        actions = self.run_monitor([health('noData', 'inactive')] * 20, health_bad_polls=1, health_max_restarts=2)
+        self.assertEqual(actions, ['restart', 'restart'])
+
+    def test_healthy_poll_resets_cap(self):
+        results = [health('noData', 'inactive')] * 3 + [health()] + [health('noData', 'inactive')]
+        actions = self.run_monitor(results, health_bad_polls=1, health_max_restarts=1)
+        self.assertEqual(actions, ['restart', 'restart'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# tests/test_youtube_manager.py
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# YouTubeManager 在第一次访问 service 时会导入 Google 客户端库，没有安装时跳过这些测试
+GOOGLE_LIBS = ('httplib2', 'googleapiclient', 'google_auth_oauthlib', 'google_auth_httplib2', 'google.oauth2')
+def _installed(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+HAVE_GOOGLE_LIBS = all(_installed(name) for name in GOOGLE_LIBS)
+
+class FakeConfig:
+    def __init__(self):
+        self.sections = {'YouTube': {
+            'client_secret_file': 'client_secret.json', 'broadcast_title': 'test', 'privacy_status': 'public',
+            'enable_auto_start': 'true', 'enable_auto_stop': 'false', 'reuse_broadcast': 'true', 'api_retries': '2',
+        }}
+
+    def get(self, section, key, default=None):
+        return self.sections.get(section, {}).get(key, default)
+
+    def get_section(self, section):
+        return self.sections.get(section, {})
+
+class FakeLogger:
+    def log(self, message):
+        pass
+
+@unittest.skipUnless(HAVE_GOOGLE_LIBS, "未安装 Google 客户端库")
+class YouTubeManagerOfflineTest(unittest.TestCase):
+    """用 youtube_fake.FakeYouTubeService 走一遍启动流程，保证模拟服务与 YouTubeManager 的用法保持一致。"""
+
+    def setUp(self):
+        from youtube_fake import FakeYouTubeService
+        # stream_info.json 等文件写在当前目录，测试在临时目录中运行
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.config = FakeConfig()
+        self.service = FakeYouTubeService()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def new_manager(self):
+        from youtube_manager import YouTubeManager
+        return YouTubeManager(FakeLogger(), self.config, service=self.service)
+
+    def test_first_start_creates_stream_and_broadcast(self):
+        youtube = self.new_manager()
+        stream_id, rtmp_url = youtube.get_or_create_stream()
+        broadcast_id = youtube.get_or_create_broadcast(stream_id)
+
+        self.assertTrue(rtmp_url.endswith(f"fake-key-{stream_id}"))
+        self.assertEqual(self.service.broadcasts[broadcast_id]['contentDetails']['boundStreamId'], stream_id)
+        self.assertEqual(dict(self.service.calls), {
+            'liveStreams.insert': 1, 'liveBroadcasts.list': 2, 'liveBroadcasts.insert': 1, 'liveBroadcasts.bind': 1,
+        })
+        self.assertEqual(self.service.batches, 1)
+        self.assertEqual(youtube.quota_stats()['quota_used'], 152)
+
+    def test_restart_reuses_stream_and_broadcast(self):
+        first = self.new_manager()
+        stream_id, _ = first.get_or_create_stream()
+        broadcast_id = first.get_or_create_broadcast(stream_id)
+        self.service.calls.clear()
+
+        second = self.new_manager()
+        self.assertEqual(second.get_or_create_stream()[0], stream_id)
+        self.assertEqual(second.get_or_create_broadcast(stream_id), broadcast_id)
+        self.assertEqual(dict(self.service.calls), {'liveBroadcasts.list': 2})
+        self.assertEqual(second.quota_stats()['quota_used'], 2)
+
+    def test_transient_error_is_retried(self):
+        self.service.fail_next('liveStreams.insert', status=503, reason='backendError')
+        youtube = self.new_manager()
+        with mock.patch('youtube_manager.time.sleep') as sleep:
+            stream_id, _ = youtube.get_or_create_stream()
+        self.assertIsNotNone(stream_id)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.service.calls['liveStreams.insert'], 2)
+        self.assertEqual(youtube.quota_stats()['quota_used'], 100) # 失败的请求同样消耗配额
+
+    def test_stream_health(self):
+        youtube = self.new_manager()
+        stream_id, _ = youtube.get_or_create_stream()
+        self.service.set_stream_health(stream_id, 'bad', [{'type': 'videoIngestionStarved', 'severity': 'error'}])
+        health = youtube.get_stream_health(stream_id)
+        self.assertEqual((health['stream_status'], health['health']), ('active', 'bad'))
+        self.assertEqual(health['issues'][0]['type'], 'videoIngestionStarved')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+# youtube_fake.py
+import json
+import threading
+from collections import Counter
+import httplib2
+from googleapiclient.errors import HttpError
+
+class FakeYouTubeService:
+    """
+    进程内的 YouTube Data API 模拟服务，实现本程序用到的 liveStreams / liveBroadcasts 接口和批量请求，
+    用于在没有网络、不消耗真实配额的情况下测试完整流程，并精确统计每个接口的调用次数。
+
+    用法:
+        service = FakeYouTubeService()
+        youtube = YouTubeManager(logger, config, service=service)
+        stream_id, rtmp_url = youtube.get_or_create_stream()
+        youtube.get_or_create_broadcast(stream_id)
+        service.calls   # Counter({'liveStreams.insert': 1, 'liveBroadcasts.list': 2, ...})
+
+    fail_next() 可以让指定接口的接下来几次调用返回错误，用于测试重试和错误处理。
+    """
+
+    # broadcastStatus 过滤条件对应的直播活动生命周期状态
+    BROADCAST_STATUS_FILTERS = {
+        'active': ('liveStarting', 'live'),
+        'upcoming': ('created', 'ready', 'testStarting', 'testing'),
+        'completed': ('complete',),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = {}
+        self.broadcasts = {}
+        self.calls = Counter()
+        self.batches = 0
+        self._failures = {}
+        self._next_id = 0
+
+    def fail_next(self, method: str, status: int = 503, reason: str = 'backendError', times: int = 1):
+        """让 method（如 'liveBroadcasts.list'）接下来的 times 次调用失败，返回指定的HTTP状态和错误原因。"""
+        self._failures[method] = [(status, reason)] * times
+
+    def set_life_cycle(self, broadcast_id: str, life_cycle: str):
+        """模拟直播活动状态变化，例如开始推流后 YouTube 把直播活动切换为 'live'。"""
+        self.broadcasts[broadcast_id]['status']['lifeCycleStatus'] = life_cycle
+
+    def set_stream_health(self, stream_id: str, health: str = 'good', issues: list | None = None, stream_status: str = 'active'):
+        """模拟 YouTube 报告的直播流接收状态和健康状况，issues 格式同 configurationIssues。"""
+        self.streams[stream_id]['status'] = {
+            'streamStatus': stream_status,
+            'healthStatus': {'status': health, 'configurationIssues': issues or []},
+        }
+
+    # --- 资源 ---
+    def liveStreams(self):
+        return _Resource(self, 'liveStreams', {'insert': self._insert_stream, 'list': self._list_streams})
+
+    def liveBroadcasts(self):
+        return _Resource(self, 'liveBroadcasts', {
+            'insert': self._insert_broadcast, 'bind': self._bind_broadcast, 'list': self._list_broadcasts,
+        })
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(self, callback)
+
+    # --- 请求分发 ---
+    def _dispatch(self, method: str, handler, kwargs: dict):
+        with self._lock:
+            self.calls[method] += 1
+            failures = self._failures.get(method)
+            if failures:
+                status, reason = failures.pop(0)
+                raise _http_error(status, reason)
+            return handler(**kwargs)
+
+    def _new_id(self, prefix: str) -> str:
+        self._next_id += 1
+        return f"{prefix}{self._next_id:04d}"
+
+    # --- liveStreams ---
+    def _insert_stream(self, part: str, body: dict) -> dict:
+        stream_id = self._new_id('stream-')
+        stream = json.loads(json.dumps(body))
+        stream['id'] = stream_id
+        stream['cdn']['ingestionInfo'] = {
+            'ingestionAddress': 'rtmp://a.rtmp.youtube.com/live2',
+            'streamName': f"fake-key-{stream_id}",
+        }
+        stream['status'] = {'streamStatus': 'inactive', 'healthStatus': {'status': 'noData', 'configurationIssues': []}}
+        self.streams[stream_id] = stream
+        return stream
+
+    def _list_streams(self, part: str, id: str | None = None, mine: bool | None = None, **_) -> dict:
+        ids = id.split(',') if id else list(self.streams)
+        return {'items': [self.streams[stream_id] for stream_id in ids if stream_id in self.streams]}
+
+    # --- liveBroadcasts ---
+    def _insert_broadcast(self, part: str, body: dict) -> dict:
+        broadcast_id = self._new_id('broadcast-')
+        broadcast = json.loads(json.dumps(body))
+        broadcast['id'] = broadcast_id
+        broadcast.setdefault('status', {})['lifeCycleStatus'] = 'ready'
+        self.broadcasts[broadcast_id] = broadcast
+        return broadcast
+
+    def _bind_broadcast(self, part: str, id: str, streamId: str | None = None) -> dict:
+        if id not in self.broadcasts:
+            raise _http_error(404, 'liveBroadcastNotFound')
+        self.broadcasts[id].setdefault('contentDetails', {})['boundStreamId'] = streamId
+        return self.broadcasts[id]
+
+    def _list_broadcasts(self, part: str, id: str | None = None, broadcastStatus: str | None = None, **_) -> dict:
+        items = list(self.broadcasts.values())
+        if id:
+            items = [item for item in items if item['id'] in id.split(',')]
+        if broadcastStatus and broadcastStatus != 'all':
+            life_cycles = self.BROADCAST_STATUS_FILTERS.get(broadcastStatus, ())
+            items = [item for item in items if item['status'].get('lifeCycleStatus') in life_cycles]
+        return {'items': items}
+
+class _Resource:
+    def __init__(self, service, name: str, handlers: dict):
+        self._service = service
+        self._name = name
+        self._handlers = handlers
+
+    def __getattr__(self, method: str):
+        if method not in self._handlers:
+            raise AttributeError(f"FakeYouTubeService 未实现 {self._name}.{method}")
+        return lambda **kwargs: _FakeRequest(self._service, f"{self._name}.{method}", self._handlers[method], kwargs)
+
+class _FakeRequest:
+    def __init__(self, service, method: str, handler, kwargs: dict):
+        self.service = service
+        self.method = method
+        self._handler = handler
+        self._kwargs = kwargs
+
+    def execute(self, num_retries: int = 0):
+        return self.service._dispatch(self.method, self._handler, self._kwargs)
+
+class _FakeBatch:
+    def __init__(self, service, callback):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self):
+        self._service.batches += 1
+        for request, callback, request_id in self._requests:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                callback(request_id, None, e)
+            else:
+                callback(request_id, response, None)
+
+def _http_error(status: int, reason: str) -> HttpError:
+    content = json.dumps({'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}}).encode('utf-8')
+    return HttpError(httplib2.Response({'status': status}), content)
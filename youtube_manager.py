@@ -1,33 +1,78 @@
 # youtube_manager.py
 import os
 import json
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import random
+import threading
+import time
 from datetime import datetime, timezone
 
+# 导入 Google 客户端库本身就要花费数秒，因此推迟到第一次真正使用 YouTube API 时才导入，
+# 让图形界面可以立即显示。下面这些名字由 _import_google_libs() 赋值。
+httplib2 = InstalledAppFlow = Request = Credentials = AuthorizedHttp = build = build_from_document = HttpError = None
+
+def _import_google_libs():
+    """按需导入 Google 客户端库（只在第一次调用时真正导入）。"""
+    global httplib2, InstalledAppFlow, Request, Credentials, AuthorizedHttp, build, build_from_document, HttpError
+    if HttpError is not None:
+        return
+    import httplib2 as _httplib2
+    from google_auth_oauthlib.flow import InstalledAppFlow as _InstalledAppFlow
+    from google.auth.transport.requests import Request as _Request
+    from google.oauth2.credentials import Credentials as _Credentials
+    from google_auth_httplib2 import AuthorizedHttp as _AuthorizedHttp
+    from googleapiclient.discovery import build as _build, build_from_document as _build_from_document
+    from googleapiclient.errors import HttpError as _HttpError
+    httplib2, InstalledAppFlow, Request, Credentials = _httplib2, _InstalledAppFlow, _Request, _Credentials
+    AuthorizedHttp, build, build_from_document = _AuthorizedHttp, _build, _build_from_document
+    HttpError = _HttpError
+
 class YouTubeManager:
     """封装所有与 YouTube Data API v3 的交互。"""
     SCOPES = ['https://www.googleapis.com/auth/youtube']
+    # 这些状态的直播活动仍可以继续使用；complete / revoked 的直播已经结束
+    REUSABLE_LIFE_CYCLES = ('created', 'ready', 'testStarting', 'testing', 'liveStarting', 'live')
+    LIVE_LIFE_CYCLES = ('liveStarting', 'live')
+    # 各API方法每次调用消耗的配额单位（默认每个项目每天 10000 单位）
+    QUOTA_COSTS = {
+        'liveStreams.list': 1, 'liveStreams.insert': 50,
+        'liveBroadcasts.list': 1, 'liveBroadcasts.insert': 50, 'liveBroadcasts.bind': 50,
+    }
+    # 可以重试的临时性错误：服务端错误和限流。quotaExceeded（当天配额用尽）重试也没有意义。
+    RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+    RETRYABLE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError')
 
-    def __init__(self, logger, config_manager):
+    def __init__(self, logger, config_manager, service=None):
         """
         初始化 YouTubeManager。
 
         Args:
             logger (UILogger): 日志记录器实例。
             config_manager (ConfigManager): 配置管理器实例。
+            service: 可选，直接使用给定的API客户端（例如 youtube_fake.FakeYouTubeService），跳过OAuth认证。
+                     不提供时，API客户端在第一次使用时才创建（见 service 属性）。
         """
         self.logger = logger
         self.config = config_manager
         self.client_secret_file = self.config.get('YouTube', 'client_secret_file')
         self.token_path = 'token.json' # 将token文件固定在程序根目录
-        self.service = self._get_authenticated_service()
+        self._api_lock = threading.Lock() # 共用的 httplib2 连接不是线程安全的，API请求逐个发送
+        self.quota_used = 0
+        self.call_counts = {}
+        self._service = service
+        self._service_lock = threading.Lock()
         self.stream_info_path = f"stream_info.json"
+        self.discovery_path = 'youtube_v3_discovery.json' # 本地缓存的 YouTube v3 API 描述文件
         self.current_broadcast_id = None # 存储当前直播活动的ID
 
+    @property
+    def service(self):
+        """API客户端。第一次使用时才导入Google客户端库并完成认证；认证失败时下次使用会重新尝试。"""
+        _import_google_libs()
+        with self._service_lock:
+            if self._service is None:
+                self._service = self._get_authenticated_service()
+            return self._service
+
     def _get_authenticated_service(self):
         """
         处理OAuth 2.0认证流程，返回一个已授权的service对象。
@@ -59,11 +104,118 @@ class YouTubeManager:
 
         if creds:
             self.logger.log("✅ [YouTube] API 认证成功。")
-            return build('youtube', 'v3', credentials=creds)
+            return self._build_service(self._authorized_http(creds))
         else:
             self.logger.log("❌ [YouTube] 无法获取有效的API凭据。")
             return None
 
+    def _build_service(self, http):
+        """
+        创建API客户端。优先使用本地缓存的API描述文件 (build_from_document)，无需任何网络请求；
+        没有缓存时正常创建，并把API描述保存到本地，供以后启动时使用。
+        """
+        if os.path.exists(self.discovery_path):
+            try:
+                with open(self.discovery_path, 'r', encoding='utf-8') as f:
+                    return build_from_document(f.read(), http=http)
+            except Exception as e:
+                self.logger.log(f"⚠️ [YouTube] 读取本地API描述文件 {self.discovery_path} 失败: {e}，将重新获取。")
+
+        service = build('youtube', 'v3', http=http)
+        document = getattr(service, '_rootDesc', None)
+        if document:
+            try:
+                with open(self.discovery_path, 'w', encoding='utf-8') as f:
+                    json.dump(document, f, ensure_ascii=False)
+                self.logger.log(f"✅ [YouTube] API描述已缓存到 {self.discovery_path}，以后启动无需再获取。")
+            except Exception as e:
+                self.logger.log(f"⚠️ [YouTube] 保存API描述文件 {self.discovery_path} 失败: {e}")
+        return service
+
+    def _authorized_http(self, creds):
+        """所有API请求共用一个带授权的HTTP连接（httplib2 会保持长连接），避免每次请求都重新建立TLS连接。"""
+        timeout = float(self.config.get_section('YouTube').get('api_timeout', 30))
+        return AuthorizedHttp(creds, http=httplib2.Http(timeout=timeout))
+
+    def _account(self, method: str):
+        self.quota_used += self.QUOTA_COSTS.get(method, 1)
+        self.call_counts[method] = self.call_counts.get(method, 0) + 1
+
+    def quota_stats(self) -> dict:
+        """本次运行累计消耗的配额单位，以及每个API方法的调用次数。"""
+        with self._api_lock:
+            return {'quota_used': self.quota_used, 'calls': dict(self.call_counts)}
+
+    def _is_transient(self, error: Exception) -> bool:
+        if not isinstance(error, HttpError):
+            return True # 网络错误（超时、连接被重置等）
+        if error.resp.status in self.RETRYABLE_STATUS:
+            return True
+        try:
+            reasons = [item.get('reason') for item in json.loads(error.content).get('error', {}).get('errors', [])]
+        except (ValueError, AttributeError, TypeError):
+            return False
+        return error.resp.status == 403 and any(reason in self.RETRYABLE_REASONS for reason in reasons)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """指数退避加随机抖动，避免多个请求在同一时刻重试。"""
+        return min(32, 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _execute(self, request, method: str):
+        """
+        执行一个API请求：记录配额消耗，遇到临时性错误（5xx、限流、网络错误）时按指数退避重试。
+        非临时性错误（参数错误、配额用尽等）直接抛出，由调用方处理。
+
+        Args:
+            request: googleapiclient 生成的请求对象。
+            method (str): API方法名，如 'liveBroadcasts.list'，用于计算配额。
+        """
+        retries = int(self.config.get_section('YouTube').get('api_retries', 4))
+        for attempt in range(retries + 1):
+            try:
+                with self._api_lock:
+                    self._account(method) # 失败的请求同样消耗配额
+                    return request.execute()
+            except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+                if attempt >= retries or not self._is_transient(e):
+                    raise
+                delay = self._backoff_delay(attempt)
+                self.logger.log(f"⚠️ [YouTube] {method} 请求失败: {e}，{delay:.1f} 秒后重试 ({attempt + 1}/{retries})...")
+                time.sleep(delay)
+
+    def _execute_batch(self, requests: list) -> list:
+        """
+        把多个读取请求合并为一次HTTP批量请求发送（配额仍按每个请求分别计算）。
+        批量请求中失败的请求会逐个通过 _execute 重试。
+
+        Args:
+            requests (list): [(请求对象, API方法名), ...]
+
+        Returns:
+            list: 与 requests 顺序一一对应的响应。
+        """
+        results = [None] * len(requests)
+
+        def on_response(request_id, response, exception):
+            if exception is None:
+                results[int(request_id)] = response
+
+        batch = self.service.new_batch_http_request(callback=on_response)
+        for index, (request, _) in enumerate(requests):
+            batch.add(request, request_id=str(index))
+        try:
+            with self._api_lock:
+                for _, method in requests:
+                    self._account(method)
+                batch.execute()
+        except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+            self.logger.log(f"⚠️ [YouTube] 批量请求失败: {e}，改为逐个请求。")
+
+        for index, (request, method) in enumerate(requests):
+            if results[index] is None:
+                results[index] = self._execute(request, method)
+        return results
+
     def _run_auth_flow(self):
         """启动本地应用网页授权流程。"""
         if not self.client_secret_file or not os.path.exists(self.client_secret_file):
@@ -109,7 +261,7 @@ class YouTubeManager:
                     "isReusable": True
                 }
             }
-            response = self.service.liveStreams().insert(part="snippet,cdn,contentDetails", body=request_body).execute()
+            response = self._execute(self.service.liveStreams().insert(part="snippet,cdn,contentDetails", body=request_body), 'liveStreams.insert')
             stream_id = response['id']
             ingestion_info = response['cdn']['ingestionInfo']
             rtmp_url = f"{ingestion_info['ingestionAddress']}/{ingestion_info['streamName']}"
@@ -127,6 +279,106 @@ class YouTubeManager:
             self.logger.log(f"❌ [YouTube] 创建直播流时发生未知错误: {e}")
             return None, None
             
+    def get_stream_health(self, stream_id: str) -> dict | None:
+        """
+        读取直播流在 YouTube 一侧的接收状态和健康状况（liveStreams.list part=status，1个配额单位）。
+
+        Args:
+            stream_id (str): 直播流的ID。
+
+        Returns:
+            dict | None: {'stream_status', 'health', 'issues', 'last_update'}，
+                         issues 为 YouTube 报告的配置问题列表（码率过低、关键帧间隔过长等）；失败时返回None。
+        """
+        if not self.service or not stream_id: return None
+        try:
+            response = self._execute(self.service.liveStreams().list(part="status", id=stream_id), 'liveStreams.list')
+        except HttpError as e:
+            self.logger.log(f"⚠️ [YouTube] 查询直播流健康状况时发生API错误: {e}")
+            return None
+        except Exception as e:
+            self.logger.log(f"⚠️ [YouTube] 查询直播流健康状况时发生未知错误: {e}")
+            return None
+
+        items = response.get('items', [])
+        if not items:
+            self.logger.log(f"⚠️ [YouTube] 未找到直播流 {stream_id}，无法查询健康状况。")
+            return None
+        status = items[0].get('status', {})
+        health = status.get('healthStatus', {})
+        return {
+            'stream_status': status.get('streamStatus'),
+            'health': health.get('status'),
+            'issues': health.get('configurationIssues', []),
+            'last_update': health.get('lastUpdateTimeSeconds'),
+        }
+
+    def get_or_create_broadcast(self, stream_id: str) -> str | None:
+        """
+        获取可以继续使用的直播活动：优先复用已绑定到该直播流的进行中或即将开始的直播活动，
+        没有可复用的直播活动时才创建并绑定一个新的。
+        每次重启都新建直播活动会消耗大量API配额（创建+绑定），还会留下无用的直播活动。
+
+        Args:
+            stream_id (str): 直播流的ID。
+
+        Returns:
+            str | None: 直播活动的ID；失败时返回None。
+        """
+        if not self.service: return None
+
+        if str(self.config.get_section('YouTube').get('reuse_broadcast', 'true')).lower() == 'true':
+            broadcast_id = self._find_reusable_broadcast(stream_id)
+            if broadcast_id:
+                self.current_broadcast_id = broadcast_id
+                return broadcast_id
+        return self.create_and_bind_broadcast(stream_id)
+
+    def _find_reusable_broadcast(self, stream_id: str) -> str | None:
+        """在进行中 (active) 和即将开始 (upcoming) 的直播活动中查找已绑定到该直播流且设置兼容的一个。"""
+        statuses = ('active', 'upcoming')
+        try:
+            # 两种状态的第一页合并为一次批量请求
+            first_pages = self._execute_batch([(self._list_broadcasts_request(status), 'liveBroadcasts.list') for status in statuses])
+            for broadcast_status, response in zip(statuses, first_pages):
+                while True:
+                    for item in response.get('items', []):
+                        if self._is_reusable_broadcast(item, stream_id):
+                            self.logger.log(f"♻️ [YouTube] 复用已绑定到直播流的直播活动 (状态: {item['status']['lifeCycleStatus']})。ID: {item['id']}")
+                            return item['id']
+                    page_token = response.get('nextPageToken')
+                    if not page_token:
+                        break
+                    response = self._execute(self._list_broadcasts_request(broadcast_status, page_token), 'liveBroadcasts.list')
+        except HttpError as e:
+            self.logger.log(f"⚠️ [YouTube] 查询已有直播活动时发生API错误: {e}，将创建新的直播活动。")
+        except Exception as e:
+            self.logger.log(f"⚠️ [YouTube] 查询已有直播活动时发生未知错误: {e}，将创建新的直播活动。")
+        return None
+
+    def _list_broadcasts_request(self, broadcast_status: str, page_token: str | None = None):
+        return self.service.liveBroadcasts().list(
+            part="id,snippet,contentDetails,status",
+            broadcastStatus=broadcast_status,
+            broadcastType="all",
+            maxResults=50,
+            pageToken=page_token
+        )
+
+    def _is_reusable_broadcast(self, item: dict, stream_id: str) -> bool:
+        if item.get('contentDetails', {}).get('boundStreamId') != stream_id:
+            return False
+        status = item.get('status', {})
+        life_cycle = status.get('lifeCycleStatus')
+        if life_cycle not in self.REUSABLE_LIFE_CYCLES:
+            return False
+        privacy_status = self.config.get_section('YouTube').get('privacy_status', 'private')
+        if status.get('privacyStatus') != privacy_status:
+            self.logger.log(f"ℹ️ [YouTube] 直播活动 {item['id']} 的隐私状态为 {status.get('privacyStatus')}，与配置的 {privacy_status} 不一致，不复用。")
+            return False
+        # 尚未开始且未开启自动开始的直播活动，推流后不会自动上线
+        return life_cycle in self.LIVE_LIFE_CYCLES or bool(item.get('contentDetails', {}).get('enableAutoStart'))
+
     def create_and_bind_broadcast(self, stream_id: str) -> str | None:
         """
         创建一个新的直播活动（Broadcast），并将其与指定的直播流（Stream）绑定。
@@ -161,21 +413,21 @@ class YouTubeManager:
                     "enableAutoStop": yt_config.get('enable_auto_stop', 'false').lower() == 'true', # 强制为false
                 }
             }
-            broadcast_response = self.service.liveBroadcasts().insert(
+            broadcast_response = self._execute(self.service.liveBroadcasts().insert(
                 part="snippet,contentDetails,status",
                 body=broadcast_body
-            ).execute()
+            ), 'liveBroadcasts.insert')
             broadcast_id = broadcast_response['id']
             self.current_broadcast_id = broadcast_id # 【关键修改】成功后保存ID
             self.logger.log(f"✅ [YouTube] 直播活动创建成功。ID: {broadcast_id}")
 
             # 2. 绑定直播活动到直播流
             self.logger.log(f"🔗 [YouTube] 正在将直播活动 ({broadcast_id}) 绑定到直播流 ({stream_id})...")
-            self.service.liveBroadcasts().bind(
+            self._execute(self.service.liveBroadcasts().bind(
                 part="id,contentDetails",
                 id=broadcast_id,
                 streamId=stream_id
-            ).execute()
+            ), 'liveBroadcasts.bind')
             self.logger.log("✅ [YouTube] 绑定成功！")
             
             return broadcast_id